@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 {
     'name': 'Telegram Group Monitor',
-    'version': '1.0',
+    'version': '1.1',
     'category': 'Tools',
     'summary': 'Monitor Telegram groups and track team response times',
     'description': """
@@ -18,7 +18,15 @@
         'views/telegram_config_views.xml',
         'views/telegram_team_member_views.xml',
         'views/telegram_group_views.xml',
+        'views/telegram_user_views.xml',
         'views/telegram_security_audit_views.xml',
+        'views/telegram_outbound_message_views.xml',
+        'views/telegram_dead_letter_views.xml',
+        'views/telegram_response_time_views.xml',
+        'views/telegram_sla_daily_views.xml',
+        'views/telegram_message_archive_views.xml',
+        'views/telegram_update_journal_views.xml',
+        'wizard/telegram_message_search_views.xml',
     ],
     'installable': True,
     'application': True,
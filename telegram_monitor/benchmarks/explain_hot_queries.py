@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""EXPLAIN the hot ingest and reporting queries of telegram_monitor
+
+Runs EXPLAIN (ANALYZE, BUFFERS) on every query the ingest path and the
+list views issue most often, and reports the plan, the indexes used and
+any sequential scan. Point it at a scratch database where the module is
+installed; with --seed it first fills that database with synthetic data
+(10M messages by default) so plans reflect production-size tables.
+
+    python3 explain_hot_queries.py --dsn dbname=telegram_bench --seed
+    python3 explain_hot_queries.py --dsn dbname=telegram_bench --verbose
+
+Seeding refuses to touch a database that already holds messages unless
+--force is given. It needs psycopg2, nothing from Odoo.
+"""
+
+import argparse
+import json
+import sys
+import time
+
+import psycopg2
+
+HOT_QUERIES = [
+    ('group lookup (_find_or_create_groups)', """
+        SELECT id FROM telegram_group
+         WHERE chat_id IN %(chat_ids)s AND config_id = %(config_id)s
+    """),
+    ('member lookup (_find_or_create_members)', """
+        SELECT id, telegram_id, group_id FROM telegram_member
+         WHERE telegram_id IN %(telegram_ids)s AND group_id IN %(group_ids)s
+    """),
+    ('message dedup (_ingest_message_batch)', """
+        SELECT message_id, group_id FROM telegram_message
+         WHERE message_id IN %(message_ids)s AND group_id IN %(group_ids)s
+    """),
+    ('group message list', """
+        SELECT id FROM telegram_message
+         WHERE group_id = %(group_id)s
+      ORDER BY message_date DESC LIMIT 80
+    """),
+    ('messages of members (is_from_team recompute, _search_text member filter)', """
+        SELECT id FROM telegram_message
+         WHERE member_id IN %(member_ids)s
+      ORDER BY message_date DESC LIMIT 51
+    """),
+    ('member join/leave (_process_member_join/_leave)', """
+        SELECT id FROM telegram_member
+         WHERE telegram_id = %(telegram_id)s AND group_id = %(group_id)s LIMIT 1
+    """),
+    ('active team member (_is_authorized_to_add_bot)', """
+        SELECT id FROM telegram_team_member
+         WHERE telegram_id = %(telegram_id)s AND is_active LIMIT 1
+    """),
+    ('active memberships of a user', """
+        SELECT id, group_id FROM telegram_member
+         WHERE telegram_id = %(telegram_id)s AND is_active
+    """),
+    ('user profiles (telegram.user._sync_profiles)', """
+        SELECT id, name, username, is_bot FROM telegram_user
+         WHERE telegram_id IN %(telegram_ids)s
+    """),
+    ('groups of a user (telegram.user memberships)', """
+        SELECT m.group_id FROM telegram_user u
+          JOIN telegram_member m ON m.user_id = u.id
+         WHERE u.telegram_id = %(telegram_id)s AND m.is_active
+    """),
+    ('pending client messages (response time engine)', """
+        SELECT id FROM telegram_response_time
+         WHERE state = 'pending' AND group_id IN %(group_ids)s
+           AND client_date <= now() AT TIME ZONE 'UTC'
+    """),
+    ('daily SLA refresh', """
+        SELECT group_id, client_date::date, count(*) FROM telegram_response_time
+         WHERE group_id IN %(group_ids)s
+           AND client_date >= (now() AT TIME ZONE 'UTC')::date - 1
+      GROUP BY 1, 2
+    """),
+    ('full-text search (_search_text, words)', """
+        SELECT id, ts_rank_cd(to_tsvector('simple'::regconfig, coalesce(message_text, '')), q) AS rank
+          FROM telegram_message, websearch_to_tsquery('simple'::regconfig, 'invoice 4f') q
+         WHERE to_tsvector('simple'::regconfig, coalesce(message_text, '')) @@ q
+      ORDER BY rank DESC, message_date DESC, id DESC LIMIT 51
+    """),
+    ('substring search (_search_text, trigram)', """
+        SELECT id FROM telegram_message
+         WHERE message_text ILIKE '%%invoice 4f2%%'
+      ORDER BY message_date DESC, id DESC LIMIT 51
+    """),
+    ('outbound queue (dispatcher)', """
+        SELECT id FROM telegram_outbound_message
+         WHERE state = 'queued' AND next_attempt_at <= now() AT TIME ZONE 'UTC'
+      ORDER BY id LIMIT 200
+    """),
+]
+
+
+def seed(cr, messages, groups, members_per_group, users):
+    """Insert synthetic configuration, groups, members and messages"""
+    started = time.monotonic()
+    cr.execute("""
+        INSERT INTO telegram_config (name, bot_token, active, last_update_id, update_mode, sla_response_minutes)
+        VALUES ('Benchmark', 'benchmark-token', true, 0, 'polling', 30)
+        RETURNING id
+    """)
+    config_id = cr.fetchone()[0]
+
+    cr.execute("""
+        INSERT INTO telegram_group (name, chat_id, chat_type, config_id, group_type, is_monitored,
+                                    needs_setup, setup_status, message_count, member_count, team_member_count)
+        SELECT 'Benchmark group ' || g, (-1000000000000 - g)::text, 'supergroup', %s, 'client', true,
+               false, 'complete', 0, 0, 0
+          FROM generate_series(1, %s) g
+        RETURNING id
+    """, (config_id, groups))
+    first_group = min(row[0] for row in cr.fetchall())
+
+    cr.execute("""
+        INSERT INTO telegram_user (name, telegram_id, is_bot)
+        SELECT 'User ' || u, (100000000 + u)::text, false
+          FROM generate_series(0, %s - 1) u
+        ON CONFLICT DO NOTHING
+    """, (users,))
+
+    # Members are inserted group after group, so the member of slot s in
+    # group g has id first_member + g * members_per_group + s
+    cr.execute("""
+        INSERT INTO telegram_member (user_id, telegram_id, group_id, is_active, is_team_member)
+        SELECT u.id, u.telegram_id, %(first_group)s + g, s %% 10 <> 0, s = 0
+          FROM generate_series(0, %(groups)s - 1) g
+    CROSS JOIN generate_series(0, %(per_group)s - 1) s
+          JOIN telegram_user u ON u.telegram_id = (100000000 + (g * %(per_group)s + s) %% %(users)s)::text
+      ORDER BY g, s
+        RETURNING id
+    """, {'per_group': members_per_group, 'users': users, 'first_group': first_group, 'groups': groups})
+    first_member = min(row[0] for row in cr.fetchall())
+
+    cr.execute("""
+        INSERT INTO telegram_team_member (name, telegram_id, is_active)
+        SELECT DISTINCT u.name, u.telegram_id, true
+          FROM telegram_member m
+          JOIN telegram_user u ON u.id = m.user_id
+         WHERE m.is_team_member AND m.group_id >= %s
+        ON CONFLICT DO NOTHING
+    """, (first_group,))
+
+    cr.execute("""
+        INSERT INTO telegram_message (message_id, group_id, member_id, message_text, message_date,
+                                      is_from_team, is_reply)
+        SELECT (i / %(groups)s)::text,
+               %(first_group)s + i %% %(groups)s,
+               %(first_member)s + (i %% %(groups)s) * %(per_group)s + (i / %(groups)s) %% %(per_group)s,
+               'Synthetic message ' || i || ' about the '
+                   || (ARRAY['order', 'invoice', 'delivery', 'refund', 'quote', 'shipment', 'payment'])[1 + i %% 7]
+                   || ' ' || md5(i::text),
+               (now() AT TIME ZONE 'UTC') - make_interval(secs => (%(messages)s - i) * 3),
+               (i / %(groups)s) %% %(per_group)s = 0,
+               false
+          FROM generate_series(0, %(messages)s - 1) i
+    """, {'groups': groups, 'first_group': first_group, 'first_member': first_member,
+          'per_group': members_per_group, 'messages': messages})
+
+    cr.execute("""
+        INSERT INTO telegram_response_time (group_id, client_message_id, client_member_id, client_date, state, sla_breached)
+        SELECT group_id, id, member_id, message_date,
+               CASE WHEN id %% 50 = 0 THEN 'pending' ELSE 'responded' END, false
+          FROM telegram_message
+         WHERE NOT is_from_team AND group_id >= %s
+    """, (first_group,))
+
+    cr.execute("""
+        UPDATE telegram_group g SET message_count = c.n
+          FROM (SELECT group_id, count(*) n FROM telegram_message GROUP BY group_id) c
+         WHERE g.id = c.group_id
+    """)
+    for table in ('telegram_group', 'telegram_user', 'telegram_member', 'telegram_team_member',
+                  'telegram_message', 'telegram_response_time'):
+        cr.execute(f"ANALYZE {table}")
+    print(f"Seeded {messages} messages in {groups} groups in {time.monotonic() - started:.0f}s")
+
+
+def sample_parameters(cr):
+    """Pick realistic parameters from the busiest group"""
+    cr.execute("SELECT id, config_id, chat_id FROM telegram_group ORDER BY message_count DESC LIMIT 20")
+    groups = cr.fetchall()
+    if not groups:
+        sys.exit("No telegram.group rows: seed the database first (--seed)")
+    group_id, config_id, _chat_id = groups[0]
+    cr.execute("SELECT id, telegram_id FROM telegram_member WHERE group_id = %s LIMIT 50", (group_id,))
+    members = cr.fetchall()
+    member_ids = tuple(row[0] for row in members) or (0,)
+    telegram_ids = tuple(row[1] for row in members) or ('0',)
+    cr.execute("SELECT message_id FROM telegram_message WHERE group_id = %s ORDER BY message_date DESC LIMIT 100",
+               (group_id,))
+    message_ids = tuple(row[0] for row in cr.fetchall()) or ('0',)
+    return {
+        'config_id': config_id,
+        'group_id': group_id,
+        'group_ids': tuple(g[0] for g in groups),
+        'chat_ids': tuple(g[2] for g in groups),
+        'telegram_id': telegram_ids[0],
+        'telegram_ids': telegram_ids,
+        'member_ids': member_ids,
+        'message_ids': message_ids,
+    }
+
+
+def walk(plan):
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from walk(child)
+
+
+def explain(cr, query, params):
+    cr.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + query, params)
+    result = cr.fetchone()[0]
+    result = result[0] if isinstance(result, list) else json.loads(result)[0]
+    nodes = list(walk(result['Plan']))
+    return {
+        'time_ms': result['Execution Time'],
+        'seq_scans': sorted({n['Relation Name'] for n in nodes if n['Node Type'] == 'Seq Scan'}),
+        'indexes': sorted({n['Index Name'] for n in nodes if 'Index Name' in n}),
+        'plan': result['Plan'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dsn', required=True, help='libpq connection string of the scratch database')
+    parser.add_argument('--seed', action='store_true', help='insert synthetic data first')
+    parser.add_argument('--force', action='store_true', help='seed even if messages already exist')
+    parser.add_argument('--messages', type=int, default=10_000_000)
+    parser.add_argument('--groups', type=int, default=5_000)
+    parser.add_argument('--members-per-group', type=int, default=40)
+    parser.add_argument('--users', type=int, default=100_000, help='distinct Telegram users')
+    parser.add_argument('--verbose', action='store_true', help='print the full plans')
+    args = parser.parse_args()
+
+    connection = psycopg2.connect(args.dsn)
+    with connection, connection.cursor() as cr:
+        if args.seed:
+            cr.execute("SELECT EXISTS (SELECT 1 FROM telegram_message)")
+            if cr.fetchone()[0] and not args.force:
+                sys.exit("telegram_message is not empty, refusing to seed without --force")
+            seed(cr, args.messages, args.groups, args.members_per_group, args.users)
+
+    seq_scan_found = False
+    with connection, connection.cursor() as cr:
+        params = sample_parameters(cr)
+        for label, query in HOT_QUERIES:
+            result = explain(cr, query, params)
+            flag = 'SEQ SCAN on ' + ', '.join(result['seq_scans']) if result['seq_scans'] else 'ok'
+            seq_scan_found |= bool(result['seq_scans'])
+            print(f"{label:<50} {result['time_ms']:>9.2f} ms  {flag}")
+            print(f"{'':<50} indexes: {', '.join(result['indexes']) or '-'}")
+            if args.verbose:
+                print(json.dumps(result['plan'], indent=2))
+        connection.rollback()
+    connection.close()
+    return 1 if seq_scan_found else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Local fake Telegram Bot API serving synthetic updates
+
+Answers ``getUpdates`` with pages of generated updates (group messages,
+``chat_member`` churn, ``my_chat_member`` changes and callback queries)
+and accepts every other method the module calls, so the ingest path can
+be driven end to end without Telegram. Point a database at it with the
+``telegram_monitor.api_base_url`` system parameter, or let the
+``telegram_bench`` command start one for you.
+
+    python3 fake_bot_api.py --port 8099 --updates 100000 --rate 2000
+
+Updates are derived from their ``update_id`` and a seed, so any page can be
+served again and two runs with the same options see the same traffic. It
+only needs the standard library.
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BOT_USER = {'id': 7000000001, 'is_bot': True, 'first_name': 'Bench Bot', 'username': 'bench_bot'}
+# Offsets keeping synthetic chat and user IDs apart from real-looking ones
+CHAT_ID_BASE = -1009000000000
+USER_ID_BASE = 8000000000
+DEFAULT_MIX = {'message': 90, 'chat_member': 5, 'my_chat_member': 2, 'callback_query': 3}
+MAX_PAGE_SIZE = 100
+
+
+class SyntheticUpdates:
+    """Deterministic stream of ``total`` updates spread over ``groups`` chats
+
+    ``rate`` caps how many updates per second become available (0 for all at
+    once). ``mix`` gives the relative weight of each update type.
+    """
+
+    def __init__(self, total, groups=50, members_per_group=20, users=None,
+                 mix=None, rate=0, seed=0):
+        self.total = total
+        self.groups = groups
+        self.members_per_group = members_per_group
+        self.users = users or groups * members_per_group
+        self.rate = rate
+        self.seed = seed
+        mix = mix or DEFAULT_MIX
+        self.kinds = list(mix)
+        self.weights = [mix[kind] for kind in self.kinds]
+        self.started_at = None
+
+    def available(self):
+        """Number of updates released so far"""
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+        if not self.rate:
+            return self.total
+        return min(self.total, int((time.monotonic() - self.started_at) * self.rate))
+
+    def page(self, offset, limit):
+        first = max(offset or 1, 1)
+        last = min(first + limit, self.available() + 1)
+        return [self.update(update_id) for update_id in range(first, last)]
+
+    def update(self, update_id):
+        rnd = random.Random(self.seed * 1000003 + update_id)
+        group = rnd.randrange(self.groups)
+        chat = {
+            'id': CHAT_ID_BASE - group,
+            'title': f'Bench Group {group}',
+            'type': 'supergroup',
+        }
+        user = self._user(group, rnd.randrange(self.members_per_group))
+        date = int(time.time())
+        kind = rnd.choices(self.kinds, self.weights)[0]
+
+        if kind == 'chat_member':
+            joined = rnd.random() < 0.5
+            return {'update_id': update_id, 'chat_member': {
+                'chat': chat, 'from': user, 'date': date,
+                'old_chat_member': {'user': user, 'status': 'left' if joined else 'member'},
+                'new_chat_member': {'user': user, 'status': 'member' if joined else 'left'},
+            }}
+        if kind == 'my_chat_member':
+            promoted = rnd.random() < 0.5
+            return {'update_id': update_id, 'my_chat_member': {
+                'chat': chat, 'from': user, 'date': date,
+                'old_chat_member': {'user': BOT_USER, 'status': 'member' if promoted else 'left'},
+                'new_chat_member': {'user': BOT_USER, 'status': 'administrator' if promoted else 'member'},
+            }}
+        if kind == 'callback_query':
+            return {'update_id': update_id, 'callback_query': {
+                'id': str(update_id), 'from': user, 'data': 'check_admin_status',
+                'message': {'message_id': update_id, 'chat': chat, 'date': date},
+            }}
+
+        message = {
+            'message_id': update_id, 'chat': chat, 'from': user, 'date': date,
+            'text': ' '.join(rnd.choice(WORDS) for _i in range(rnd.randint(3, 30))),
+        }
+        if update_id > 1 and rnd.random() < 0.2:
+            message['reply_to_message'] = {'message_id': rnd.randrange(1, update_id), 'chat': chat}
+        return {'update_id': update_id, 'message': message}
+
+    def _user(self, group, index):
+        user_id = USER_ID_BASE + (group * self.members_per_group + index) % self.users
+        return {'id': user_id, 'is_bot': False, 'first_name': f'User {user_id}',
+                'username': f'user{user_id}'}
+
+
+WORDS = (
+    'order invoice delivery payment refund please thanks status when today '
+    'tomorrow account price quote shipment tracking issue help urgent ok'
+).split()
+
+
+class FakeBotApi:
+    """Threaded HTTP server speaking enough of the Bot API for the module"""
+
+    def __init__(self, updates, host='127.0.0.1', port=0):
+        self.updates = updates
+        self.calls = Counter()
+        self._calls_lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever,
+                                        name='fake_bot_api', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handle(self, method, payload):
+        with self._calls_lock:
+            self.calls[method] += 1
+        if method == 'getUpdates':
+            return self._get_updates(payload)
+        if method == 'getMe':
+            return BOT_USER
+        if method == 'getChatMember':
+            return {'user': {'id': payload.get('user_id')}, 'status': 'administrator'}
+        if method == 'exportChatInviteLink':
+            return f"https://t.me/+bench{abs(int(payload.get('chat_id', 0)))}"
+        if method == 'sendMessage':
+            return {'message_id': 1, 'chat': {'id': payload.get('chat_id')},
+                    'date': int(time.time()), 'text': payload.get('text', '')}
+        return True
+
+    def _get_updates(self, payload):
+        limit = min(int(payload.get('limit') or MAX_PAGE_SIZE), MAX_PAGE_SIZE)
+        deadline = time.monotonic() + float(payload.get('timeout') or 0)
+        while True:
+            page = self.updates.page(payload.get('offset'), limit)
+            if page or time.monotonic() >= deadline or self.updates.available() >= self.updates.total:
+                return page
+            time.sleep(0.05)
+
+
+def _make_handler(api):
+    path_re = re.compile(r'^/bot[^/]+/(\w+)$')
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            match = path_re.match(self.path)
+            length = int(self.headers.get('Content-Length') or 0)
+            body = self.rfile.read(length) if length else b''
+            if not match:
+                return self._reply(404, {'ok': False, 'error_code': 404, 'description': 'Not Found'})
+            payload = json.loads(body or b'{}')
+            self._reply(200, {'ok': True, 'result': api.handle(match.group(1), payload)})
+
+        def _reply(self, status, data):
+            body = json.dumps(data).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def parse_mix(value):
+    """Parse ``message=90,chat_member=5`` into a weight per update type"""
+    mix = {}
+    for item in value.split(','):
+        kind, _sep, weight = item.partition('=')
+        if kind.strip() not in DEFAULT_MIX:
+            raise ValueError(f"unknown update type {kind.strip()!r}")
+        mix[kind.strip()] = float(weight)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--updates', type=int, default=100_000, help='updates to serve in total')
+    parser.add_argument('--rate', type=float, default=0, help='updates released per second, 0 for all at once')
+    parser.add_argument('--groups', type=int, default=50)
+    parser.add_argument('--members-per-group', type=int, default=20)
+    parser.add_argument('--users', type=int, default=0, help='distinct Telegram users (default: no overlap between groups)')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help='relative weight per update type, e.g. message=90,chat_member=5,my_chat_member=2,callback_query=3')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    updates = SyntheticUpdates(args.updates, groups=args.groups, members_per_group=args.members_per_group,
+                               users=args.users, mix=args.mix, rate=args.rate, seed=args.seed)
+    api = FakeBotApi(updates, host=args.host, port=args.port)
+    print(f"Serving {args.updates} synthetic updates on {api.url}")
+    try:
+        api.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        api.server.server_close()
+        print(json.dumps(dict(api.calls), sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+
+from . import telegram_bench
+from . import telegram_export
+from . import telegram_poll
+from . import telegram_replay
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+import json
+import logging
+import math
+import optparse
+import os
+import subprocess
+import time
+from collections import defaultdict
+
+from odoo import api, SUPERUSER_ID
+from odoo.cli import Command
+from odoo.modules.registry import Registry
+from odoo.tools import config
+
+from ..benchmarks.fake_bot_api import DEFAULT_MIX, FakeBotApi, SyntheticUpdates, parse_mix
+from ..models.telegram_config import API_BASE_URL_PARAM
+from ..tools.metrics import update_type
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_OUTPUT = 'telegram_bench_results.jsonl'
+
+
+class TelegramBench(Command):
+    """Benchmark update ingestion against a local fake Bot API
+
+    Usage: odoo-bin telegram_bench -c odoo.conf -d <scratch database> [--updates 20000]
+
+    Starts the fake Bot API of ``benchmarks/fake_bot_api.py``, points
+    ``telegram_monitor.api_base_url`` at it and creates a dedicated bot
+    configuration. Two phases follow:
+
+    * throughput: pages are pulled with ``_fetch_updates`` and committed one
+      by one, as the poll worker does, to measure updates/sec and SQL
+      queries per update;
+    * latency: ``--samples`` updates of each type are fed one at a time to
+      ``_process_updates`` to measure p50/p99 latency and queries per type.
+
+    Every run is appended as one JSON line to ``--output`` so results can be
+    compared across commits. The data it creates is kept, so only run it on
+    a scratch database; it refuses to run where messages already exist
+    unless --force is given.
+
+    Stop any Odoo server running the "Poll Telegram Messages" scheduled
+    action on that database first, or it will consume the same updates.
+    """
+    name = 'telegram_bench'
+
+    def run(self, cmdargs):
+        parser = config.parser
+        group = optparse.OptionGroup(parser, "Telegram Benchmark Configuration")
+        group.add_option("--updates", dest="bench_updates", type="int", default=20000,
+                         help="Updates served during the throughput phase")
+        group.add_option("--samples", dest="bench_samples", type="int", default=200,
+                         help="Updates of each type processed one by one during the latency phase")
+        group.add_option("--rate", dest="bench_rate", type="float", default=0,
+                         help="Updates released per second by the fake API, 0 for all at once")
+        group.add_option("--groups", dest="bench_groups", type="int", default=50)
+        group.add_option("--members-per-group", dest="bench_members_per_group", type="int", default=20)
+        group.add_option("--users", dest="bench_users", type="int", default=0,
+                         help="Distinct Telegram users (default: no overlap between groups)")
+        group.add_option("--mix", dest="bench_mix", default=None,
+                         help="Relative weight per update type, e.g. message=90,chat_member=5,"
+                              "my_chat_member=2,callback_query=3")
+        group.add_option("--seed", dest="bench_seed", type="int", default=0)
+        group.add_option("--output", dest="bench_output", default=DEFAULT_OUTPUT,
+                         help="JSON lines file the results are appended to")
+        group.add_option("--force", dest="bench_force", action="store_true", default=False,
+                         help="Run even if the database already holds messages")
+        parser.add_option_group(group)
+        opt = config.parse_config(cmdargs)
+        dbname = config['db_name']
+        if not dbname or ',' in dbname:
+            parser.error("telegram_bench needs exactly one database (-d)")
+
+        bench = TelegramBenchmark(
+            dbname,
+            updates=opt.bench_updates,
+            samples=opt.bench_samples,
+            rate=opt.bench_rate,
+            groups=opt.bench_groups,
+            members_per_group=opt.bench_members_per_group,
+            users=opt.bench_users,
+            mix=parse_mix(opt.bench_mix) if opt.bench_mix else DEFAULT_MIX,
+            seed=opt.bench_seed,
+        )
+        result = bench.run(force=opt.bench_force)
+        with open(opt.bench_output, 'a') as f:
+            f.write(json.dumps(result, sort_keys=True) + '\n')
+        print(format_result(result))
+        print(f"Appended to {opt.bench_output}")
+
+
+class TelegramBenchmark:
+    """Drive the ingest path of one database against a fake Bot API"""
+
+    def __init__(self, dbname, updates, samples, rate, groups, members_per_group, users, mix, seed):
+        self.dbname = dbname
+        self.samples = samples
+        self.params = {
+            'updates': updates, 'samples': samples, 'rate': rate, 'groups': groups,
+            'members_per_group': members_per_group, 'users': users, 'mix': mix, 'seed': seed,
+        }
+        self.stream = SyntheticUpdates(updates, groups=groups, members_per_group=members_per_group,
+                                       users=users, mix=mix, rate=rate, seed=seed)
+
+    def run(self, force=False):
+        registry = Registry(self.dbname)
+        api_server = FakeBotApi(self.stream).start()
+        with registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            if not force and env['telegram.message'].search_count([], limit=1):
+                raise SystemExit(f"Database {self.dbname} already holds messages, use --force to benchmark it anyway")
+            params = env['ir.config_parameter']
+            previous_url = params.get_param(API_BASE_URL_PARAM)
+            params.set_param(API_BASE_URL_PARAM, api_server.url)
+            config_id = env['telegram.config'].create({
+                'name': f"Benchmark {datetime.datetime.now():%Y-%m-%d %H:%M:%S}",
+                'bot_token': f'bench:{os.getpid()}',
+                'update_mode': 'polling',
+            }).id
+        _logger.info("Benchmarking configuration %s against %s", config_id, api_server.url)
+
+        try:
+            throughput = self._run_throughput(registry, config_id)
+            latency = self._run_latency(registry, config_id)
+        finally:
+            api_server.stop()
+            with registry.cursor() as cr:
+                env = api.Environment(cr, SUPERUSER_ID, {})
+                env['ir.config_parameter'].set_param(API_BASE_URL_PARAM, previous_url or False)
+                env['telegram.config'].browse(config_id).active = False
+
+        return {
+            'date': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'revision': _git_revision(),
+            'database': self.dbname,
+            'params': self.params,
+            'throughput': throughput,
+            'latency': latency,
+            'api_calls': dict(api_server.calls),
+        }
+
+    def _run_throughput(self, registry, config_id):
+        """Pull every page through ``_fetch_updates``, one transaction per page"""
+        processed = queries = 0
+        started = time.perf_counter()
+        while processed < self.stream.total:
+            with registry.cursor() as cr:
+                env = api.Environment(cr, SUPERUSER_ID, {})
+                count_before = cr.sql_log_count
+                count = env['telegram.config'].browse(config_id)._fetch_updates(timeout=1)
+                queries += cr.sql_log_count - count_before
+            if count is None:
+                raise SystemExit("getUpdates failed against the fake Bot API, see the log")
+            processed += count
+        elapsed = time.perf_counter() - started
+        return {
+            'updates': processed,
+            'seconds': round(elapsed, 3),
+            'updates_per_sec': round(processed / elapsed, 1) if elapsed else None,
+            'queries_per_update': round(queries / processed, 2) if processed else None,
+        }
+
+    def _run_latency(self, registry, config_id):
+        """Process ``samples`` updates of each type one at a time"""
+        samples = defaultdict(list)
+        update_id = self.stream.total
+        wanted = {kind for kind, weight in self.params['mix'].items() if weight}
+        while wanted and update_id < self.stream.total + self.samples * 1000:
+            update_id += 1
+            update = self.stream.update(update_id)
+            kind = update_type(update)
+            if kind in wanted:
+                samples[kind].append(update)
+                if len(samples[kind]) >= self.samples:
+                    wanted.discard(kind)
+
+        latency = {}
+        for kind, updates in sorted(samples.items()):
+            durations, queries = [], 0
+            for update in updates:
+                with registry.cursor() as cr:
+                    env = api.Environment(cr, SUPERUSER_ID, {})
+                    telegram_config = env['telegram.config'].browse(config_id)
+                    count_before = cr.sql_log_count
+                    started = time.perf_counter()
+                    telegram_config._process_updates([update])
+                    env.flush_all()
+                    durations.append(time.perf_counter() - started)
+                    queries += cr.sql_log_count - count_before
+            durations.sort()
+            latency[kind] = {
+                'count': len(durations),
+                'p50_ms': round(percentile(durations, 50) * 1000, 2),
+                'p99_ms': round(percentile(durations, 99) * 1000, 2),
+                'queries_per_update': round(queries / len(durations), 2),
+            }
+        return latency
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values), math.ceil(pct * len(sorted_values) / 100)) - 1)
+    return sorted_values[index]
+
+
+def format_result(result):
+    throughput = result['throughput']
+    lines = [
+        f"{throughput['updates']} updates in {throughput['seconds']}s: "
+        f"{throughput['updates_per_sec']} updates/sec, {throughput['queries_per_update']} queries/update",
+        f"{'type':<16}{'count':>8}{'p50 ms':>10}{'p99 ms':>10}{'queries':>10}",
+    ]
+    for kind, stats in result['latency'].items():
+        lines.append(f"{kind:<16}{stats['count']:>8}{stats['p50_ms']:>10}{stats['p99_ms']:>10}"
+                     f"{stats['queries_per_update']:>10}")
+    return '\n'.join(lines)
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(__file__), stderr=subprocess.DEVNULL, text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
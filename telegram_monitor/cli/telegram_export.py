@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import optparse
+import sys
+
+from odoo import fields
+from odoo.cli import Command
+from odoo.modules.registry import Registry
+from odoo.tools import config
+
+from ..tools import export
+
+_logger = logging.getLogger(__name__)
+
+
+class TelegramExport(Command):
+    """Export messages or SLA data with constant memory use
+
+    Usage: odoo-bin telegram_export -c odoo.conf -d <database> --dataset messages
+                                    [--format csv|ndjson|parquet] [--output messages.csv]
+                                    [--date-from 2026-01-01] [--date-to 2026-02-01] [--groups 4,8]
+
+    Rows are read with a server-side cursor and written chunk by chunk.
+    Messages include the archive and the resolved group, member and team
+    flags. Without --output, CSV and NDJSON go to standard output; Parquet
+    needs --output and the pyarrow package.
+    """
+    name = 'telegram_export'
+
+    def run(self, cmdargs):
+        parser = config.parser
+        group = optparse.OptionGroup(parser, "Telegram Export Configuration")
+        group.add_option("--dataset", dest="export_dataset", default='messages',
+                         help=f"What to export: {', '.join(export.DATASETS)}")
+        group.add_option("--format", dest="export_format", default='csv',
+                         help=f"Output format: {', '.join(export.FORMATS)}")
+        group.add_option("--output", dest="export_output", help="File to write, standard output by default")
+        group.add_option("--date-from", dest="export_date_from", help="First UTC date/datetime exported")
+        group.add_option("--date-to", dest="export_date_to", help="UTC date/datetime the export stops before")
+        group.add_option("--groups", dest="export_groups", help="Comma-separated telegram.group IDs, all by default")
+        group.add_option("--chunk-size", dest="export_chunk_size", type="int", default=export.CHUNK_SIZE,
+                         help="Rows fetched from the database at a time")
+        parser.add_option_group(group)
+        opt = config.parse_config(cmdargs)
+        dbname = config['db_name']
+        if not dbname or ',' in dbname:
+            parser.error("telegram_export needs exactly one database (-d)")
+        if opt.export_dataset not in export.DATASETS:
+            parser.error(f"unknown dataset {opt.export_dataset}")
+        if opt.export_format not in export.FORMATS:
+            parser.error(f"unknown format {opt.export_format}")
+        if opt.export_format == 'parquet' and not opt.export_output:
+            parser.error("Parquet exports need --output")
+
+        filters = {
+            'date_from': fields.Datetime.to_datetime(opt.export_date_from) if opt.export_date_from else None,
+            'date_to': fields.Datetime.to_datetime(opt.export_date_to) if opt.export_date_to else None,
+            'group_ids': [int(group_id) for group_id in opt.export_groups.split(',')] if opt.export_groups else None,
+            'chunk_size': opt.export_chunk_size,
+        }
+        with Registry(dbname).cursor() as cr:
+            if opt.export_format == 'parquet':
+                count = export.write_parquet(cr, opt.export_dataset, opt.export_output, **filters)
+                _logger.info("Exported %s row(s) to %s", count, opt.export_output)
+                return
+            output = open(opt.export_output, 'wb') if opt.export_output else sys.stdout.buffer
+            try:
+                for data in export.stream(cr, opt.export_dataset, opt.export_format, **filters):
+                    output.write(data)
+            finally:
+                if opt.export_output:
+                    output.close()
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import optparse
+import signal
+import threading
+
+from odoo import api, SUPERUSER_ID
+from odoo.cli import Command
+from odoo.modules.registry import Registry
+from odoo.tools import config
+
+from ..models.telegram_config import POLL_WORKER_HEARTBEAT_INTERVAL
+from ..tools import metrics
+
+_logger = logging.getLogger(__name__)
+
+# Pause before polling again after a failed getUpdates call
+ERROR_BACKOFF = 5
+
+
+class TelegramPoll(Command):
+    """Continuously long-poll Telegram for every active bot configuration
+
+    Usage: odoo-bin telegram_poll -c odoo.conf -d <database>
+
+    Runs one thread per active ``telegram.config``. Each thread calls
+    ``getUpdates`` in a loop, so a backlog is drained page after page and new
+    messages are stored as soon as Telegram returns them. Every page is
+    processed and committed in its own transaction. While the worker is
+    running, the "Poll Telegram Messages" scheduled action skips polling.
+
+    With --metrics-port, the ingestion metrics published by every worker
+    are served on http://127.0.0.1:<port>/metrics for Prometheus.
+    """
+    name = 'telegram_poll'
+
+    def run(self, cmdargs):
+        parser = config.parser
+        group = optparse.OptionGroup(parser, "Telegram Poll Configuration")
+        group.add_option("--refresh-interval", dest="refresh_interval", type="int",
+                         default=POLL_WORKER_HEARTBEAT_INTERVAL,
+                         help="Seconds between checks for added or deactivated bot configurations")
+        group.add_option("--metrics-port", dest="metrics_port", type="int", default=0,
+                         help="Serve Prometheus metrics on this local port (disabled by default)")
+        parser.add_option_group(group)
+        opt = config.parse_config(cmdargs)
+        dbname = config['db_name']
+        if not dbname or ',' in dbname:
+            parser.error("telegram_poll needs exactly one database (-d)")
+
+        if opt.metrics_port:
+            metrics.start_http_server(opt.metrics_port)
+            _logger.info("Serving Telegram poll metrics on port %s", opt.metrics_port)
+
+        worker = TelegramPollWorker(dbname, refresh_interval=opt.refresh_interval)
+        signal.signal(signal.SIGINT, lambda sig, frame: worker.stop())
+        signal.signal(signal.SIGTERM, lambda sig, frame: worker.stop())
+        worker.run()
+
+
+class TelegramPollWorker:
+    """Supervise one long-polling thread per active bot configuration"""
+
+    def __init__(self, dbname, refresh_interval=POLL_WORKER_HEARTBEAT_INTERVAL):
+        self.dbname = dbname
+        self.refresh_interval = refresh_interval
+        self.stop_event = threading.Event()
+        self.threads = {}
+
+    def stop(self):
+        _logger.info("Stopping Telegram poll worker")
+        self.stop_event.set()
+
+    def run(self):
+        _logger.info("Telegram poll worker started on database %s", self.dbname)
+        while not self.stop_event.is_set():
+            try:
+                self._refresh()
+            except Exception:
+                _logger.exception("Telegram poll worker failed to refresh configurations")
+            self.stop_event.wait(self.refresh_interval)
+        for thread in self.threads.values():
+            thread.join(timeout=1)
+
+    def _refresh(self):
+        """Write the heartbeat and start a thread for each new active configuration"""
+        registry = Registry(self.dbname).check_signaling()
+        with registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            env['telegram.config']._poll_worker_heartbeat()
+            config_ids = env['telegram.config'].search([
+                ('active', '=', True), ('update_mode', '=', 'polling'),
+            ]).ids
+
+        for config_id in config_ids:
+            thread = self.threads.get(config_id)
+            if thread and thread.is_alive():
+                continue
+            thread = threading.Thread(
+                target=self._poll_loop, args=(config_id,),
+                name=f'telegram_poll.{self.dbname}.{config_id}', daemon=True,
+            )
+            self.threads[config_id] = thread
+            thread.start()
+
+    def _poll_loop(self, config_id):
+        """Long-poll one configuration until it is deactivated or the worker stops"""
+        _logger.info("Long-polling Telegram for configuration %s", config_id)
+        while not self.stop_event.is_set():
+            try:
+                registry = Registry(self.dbname).check_signaling()
+                with registry.cursor() as cr:
+                    env = api.Environment(cr, SUPERUSER_ID, {})
+                    telegram_config = env['telegram.config'].browse(config_id).exists()
+                    if not telegram_config or not telegram_config.active or telegram_config.update_mode != 'polling':
+                        _logger.info("Configuration %s is no longer polled, stop polling it", config_id)
+                        return
+                    count = telegram_config._fetch_updates()
+                # The page is committed when the cursor closes. While a backlog
+                # remains, the next getUpdates call returns immediately.
+            except Exception:
+                _logger.exception("Error while polling Telegram for configuration %s", config_id)
+                count = None
+            if count is None:
+                self.stop_event.wait(ERROR_BACKOFF)
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import optparse
+
+from odoo import api, fields, SUPERUSER_ID
+from odoo.cli import Command
+from odoo.modules.registry import Registry
+from odoo.tools import config
+
+from ..models.telegram_update_journal import REPLAY_DEFAULT_TYPES
+
+_logger = logging.getLogger(__name__)
+
+REPLAY_TYPES = ('message', 'member_message', 'chat_member', 'my_chat_member', 'callback_query')
+
+
+class TelegramReplay(Command):
+    """Run the update handlers again over journaled raw updates
+
+    Usage: odoo-bin telegram_replay -c odoo.conf -d <database> --telegram-config <id>
+                                    [--since 2026-01-01] [--until 2026-02-01]
+                                    [--types message,chat_member] [--dry-run]
+
+    Replays the pages of ``telegram.update.journal`` received in the given
+    range, oldest first, committing after every batch of pages. By default
+    only messages and member changes are replayed; callback queries and bot
+    status changes send messages to Telegram and must be asked for with
+    --types.
+    """
+    name = 'telegram_replay'
+
+    def run(self, cmdargs):
+        parser = config.parser
+        group = optparse.OptionGroup(parser, "Telegram Replay Configuration")
+        group.add_option("--telegram-config", dest="replay_config_id", type="int",
+                         help="ID of the bot configuration whose journal is replayed")
+        group.add_option("--since", dest="replay_since",
+                         help="Replay pages received at or after this UTC date/datetime")
+        group.add_option("--until", dest="replay_until",
+                         help="Replay pages received before this UTC date/datetime")
+        group.add_option("--types", dest="replay_types", default=','.join(REPLAY_DEFAULT_TYPES),
+                         help=f"Comma-separated update types to replay, among {', '.join(REPLAY_TYPES)}")
+        group.add_option("--dry-run", dest="replay_dry_run", action="store_true", default=False,
+                         help="Only report how many journal pages and updates are in range")
+        parser.add_option_group(group)
+        opt = config.parse_config(cmdargs)
+        dbname = config['db_name']
+        if not dbname or ',' in dbname:
+            parser.error("telegram_replay needs exactly one database (-d)")
+        if not opt.replay_config_id:
+            parser.error("--telegram-config is required")
+        types = tuple(t.strip() for t in opt.replay_types.split(',') if t.strip())
+        unknown = set(types) - set(REPLAY_TYPES)
+        if unknown:
+            parser.error(f"unknown update type(s): {', '.join(sorted(unknown))}")
+        since = fields.Datetime.to_datetime(opt.replay_since) if opt.replay_since else None
+        until = fields.Datetime.to_datetime(opt.replay_until) if opt.replay_until else None
+
+        registry = Registry(dbname)
+        with registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            telegram_config = env['telegram.config'].browse(opt.replay_config_id).exists()
+            if not telegram_config:
+                parser.error(f"no bot configuration with ID {opt.replay_config_id}")
+            Journal = env['telegram.update.journal']
+            if opt.replay_dry_run:
+                domain = [('config_id', '=', telegram_config.id)]
+                if since:
+                    domain.append(('received_at', '>=', since))
+                if until:
+                    domain.append(('received_at', '<', until))
+                [(pages, updates)] = Journal._read_group(domain, [], ['__count', 'update_count:sum'])
+                print(f"{pages} journal page(s) with {updates or 0} update(s) in range")
+                return
+            replayed = Journal._replay(telegram_config, since=since, until=until,
+                                       types=types, auto_commit=True)
+        print(f"Replayed {replayed} update(s)")
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+import hmac
+import json
+import logging
+
+from odoo import fields, http
+from odoo.http import content_disposition, request, Response
+from werkzeug.exceptions import BadRequest, Forbidden, NotFound
+
+from ..tools import export, metrics
+
+_logger = logging.getLogger(__name__)
+
+# ir.config_parameter holding the bearer token Prometheus must send;
+# the metrics endpoint is disabled while it is not set
+METRICS_TOKEN_PARAM = 'telegram_monitor.metrics_token'
+
+
+class TelegramWebhookController(http.Controller):
+
+    @http.route('/telegram_monitor/webhook/<int:config_id>', type='http', auth='public',
+                methods=['POST'], csrf=False, save_session=False)
+    def telegram_webhook(self, config_id, **kwargs):
+        """Receive an update pushed by Telegram (see setWebhook)
+
+        The request must carry the configuration's webhook secret in the
+        X-Telegram-Bot-Api-Secret-Token header. The update is handed to
+        ``_process_updates``, the same dispatch used by polling, without
+        writing the polling offset: Telegram may deliver several updates of
+        a bot concurrently, and they would all update the configuration row.
+        """
+        config = request.env['telegram.config'].sudo().browse(config_id).exists()
+        if not config or not config.active or config.update_mode != 'webhook':
+            raise NotFound()
+
+        token = request.httprequest.headers.get('X-Telegram-Bot-Api-Secret-Token', '')
+        if not config.webhook_secret or not hmac.compare_digest(token, config.webhook_secret):
+            _logger.warning(f"🔐 Rejected webhook request with invalid secret for configuration {config_id}")
+            raise Forbidden()
+
+        try:
+            update = json.loads(request.httprequest.get_data())
+        except ValueError:
+            raise BadRequest()
+        updates = update if isinstance(update, list) else [update]
+
+        config._process_updates(updates, update_offset=False)
+        return request.make_json_response({'ok': True})
+
+    @http.route('/telegram_monitor/metrics', type='http', auth='public', methods=['GET'],
+                csrf=False, save_session=False)
+    def telegram_metrics(self, **kwargs):
+        """Ingestion metrics of every Odoo and telegram_poll worker in the Prometheus text format
+
+        Requires an ``Authorization: Bearer <token>`` header matching the
+        telegram_monitor.metrics_token system parameter.
+        """
+        expected = request.env['ir.config_parameter'].sudo().get_param(METRICS_TOKEN_PARAM)
+        if not expected:
+            raise NotFound()
+        authorization = request.httprequest.headers.get('Authorization', '')
+        if not hmac.compare_digest(authorization, f'Bearer {expected}'):
+            raise Forbidden()
+        return request.make_response(metrics.render(), headers=[('Content-Type', metrics.CONTENT_TYPE)])
+
+    @http.route('/telegram_monitor/export/<string:dataset>', type='http', auth='user', methods=['GET'])
+    def telegram_export(self, dataset, format='csv', date_from=None, date_to=None, group_ids=None, **kwargs):
+        """Stream messages, response times or daily SLA statistics as CSV or NDJSON
+
+        ``dataset`` is one of ``messages``, ``response_times`` or ``sla_daily``.
+        ``date_from`` (inclusive) and ``date_to`` (exclusive) are UTC dates
+        or datetimes, ``group_ids`` a comma-separated list of group IDs.
+        Parquet is only available from the telegram_export command.
+        """
+        if dataset not in export.DATASETS or format not in ('csv', 'ndjson'):
+            raise NotFound()
+        for model in ('telegram.message', 'telegram.message.archive', 'telegram.response.time', 'telegram.sla.daily'):
+            request.env[model].check_access('read')
+        try:
+            filters = {
+                'date_from': fields.Datetime.to_datetime(date_from) if date_from else None,
+                'date_to': fields.Datetime.to_datetime(date_to) if date_to else None,
+                'group_ids': [int(group_id) for group_id in group_ids.split(',')] if group_ids else None,
+            }
+        except ValueError:
+            raise BadRequest()
+
+        # The request cursor is closed before the response body is sent:
+        # rows are read on a cursor of their own while streaming
+        registry = request.env.registry
+
+        def generate():
+            with registry.cursor() as cr:
+                yield from export.stream(cr, dataset, format, **filters)
+
+        filename = f"telegram_{dataset}.{format}"
+        return Response(generate(), direct_passthrough=True, headers=[
+            ('Content-Type', export.CONTENT_TYPES[format]),
+            ('Content-Disposition', content_disposition(filename)),
+        ])
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""Drop the single-column indexes replaced by composite and partial ones
+
+Odoo keeps an index it no longer expects ("Keep unexpected index"), so the
+indexes of fields that lost ``index=True`` stay on upgraded databases and
+slow down every insert unless they are dropped here.
+"""
+import logging
+
+from odoo.tools import sql
+
+_logger = logging.getLogger(__name__)
+
+REDUNDANT_INDEXES = [
+    ('telegram_group', 'chat_id'),
+    ('telegram_member', 'telegram_id'),
+    ('telegram_message', 'message_id'),
+    ('telegram_message', 'group_id'),
+    ('telegram_outbound_message', 'state'),
+    ('telegram_outbound_message', 'next_attempt_at'),
+    ('telegram_response_time', 'group_id'),
+    ('telegram_response_time', 'state'),
+    ('telegram_sla_daily', 'group_id'),
+    ('telegram_team_member', 'telegram_id'),
+]
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    for table, column in REDUNDANT_INDEXES:
+        # Current name of field indexes, and the one of databases first
+        # installed before Odoo 16
+        for indexname in (sql.make_index_name(table, column), f'{table}_{column}_index'):
+            if sql.index_exists(cr, indexname):
+                sql.drop_index(cr, indexname, table)
+                _logger.info("Dropped redundant index %s", indexname)
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""Move the per-group member profiles to one telegram.user row per Telegram user
+
+Profiles are taken from each user's most recently written membership;
+username, phone and email fall back to the latest membership that has one.
+The profile columns of telegram_member are then dropped.
+"""
+import logging
+
+from odoo.tools import sql
+
+_logger = logging.getLogger(__name__)
+
+PROFILE_COLUMNS = ('name', 'username', 'is_bot', 'phone', 'email')
+
+
+def _latest(column):
+    return f"""(array_agg({column} ORDER BY write_date DESC NULLS LAST, id DESC)
+                FILTER (WHERE coalesce({column}, '') <> ''))[1]"""
+
+
+def migrate(cr, version):
+    if not version or not sql.column_exists(cr, 'telegram_member', 'name'):
+        return
+
+    cr.execute(f"""
+        INSERT INTO telegram_user (telegram_id, name, username, is_bot, phone, email,
+                                   create_uid, create_date, write_uid, write_date)
+        SELECT telegram_id,
+               coalesce({_latest('name')}, 'Unknown'),
+               {_latest('username')},
+               bool_or(coalesce(is_bot, false)),
+               {_latest('phone')},
+               {_latest('email')},
+               1, min(create_date), 1, max(write_date)
+          FROM telegram_member
+         GROUP BY telegram_id
+        ON CONFLICT (telegram_id) DO NOTHING
+    """)
+    _logger.info("Created %s telegram.user records from group members", cr.rowcount)
+
+    cr.execute("""
+        UPDATE telegram_member m
+           SET user_id = u.id
+          FROM telegram_user u
+         WHERE u.telegram_id = m.telegram_id
+           AND m.user_id IS NULL
+    """)
+    sql.set_not_null(cr, 'telegram_member', 'user_id')
+
+    cr.execute("ALTER TABLE telegram_member " + ", ".join(
+        f"DROP COLUMN IF EXISTS {column}" for column in PROFILE_COLUMNS))
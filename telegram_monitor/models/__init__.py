@@ -3,6 +3,13 @@
 from . import telegram_config
 from . import telegram_team_member
 from . import telegram_group
+from . import telegram_user
 from . import telegram_member
 from . import telegram_message
-from . import telegram_security_audit
\ No newline at end of file
+from . import telegram_message_archive
+from . import telegram_security_audit
+from . import telegram_outbound_message
+from . import telegram_dead_letter
+from . import telegram_update_journal
+from . import telegram_response_time
+from . import telegram_sla_daily
\ No newline at end of file
@@ -1,13 +1,40 @@
 # -*- coding: utf-8 -*-
 
+import odoo
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
-import requests
 import logging
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
+from ..tools import ingest_cache, metrics
+from ..tools.telegram_api import TELEGRAM_API_URL, TelegramApiClient, TelegramApiError
+
 _logger = logging.getLogger(__name__)
 
+# Seconds Telegram keeps a getUpdates request open when there is nothing to return
+LONG_POLL_TIMEOUT = 25
+# ir.config_parameter refreshed by the telegram_poll worker (see cli/telegram_poll.py)
+POLL_WORKER_HEARTBEAT_PARAM = 'telegram_monitor.poll_worker_heartbeat'
+POLL_WORKER_HEARTBEAT_INTERVAL = 60
+# Seconds a getChatMember answer is reused when checking the bot's admin status
+CHAT_MEMBER_CACHE_TTL = 15
+# Upper bound on configurations polled in parallel by the scheduled action
+MAX_CONCURRENT_POLLS = 8
+# Parallel getChatMember calls made by the setup watchdog and the team reconciliation
+MAX_CONCURRENT_CHAT_MEMBER_CHECKS = 8
+# Former team members listed by name in one offboarding alert
+OFFBOARDING_ALERT_MAX_USERS = 30
+# First key of the advisory lock taken while polling a configuration ("TGMP")
+POLL_LOCK_NAMESPACE = 0x54474d50
+# Update types requested from Telegram, both for getUpdates and setWebhook
+ALLOWED_UPDATES = ['message', 'channel_post', 'my_chat_member', 'chat_member', 'callback_query']
+# ir.config_parameter overriding the Bot API URL, e.g. to use a local Bot API
+# server or the fake one of benchmarks/fake_bot_api.py
+API_BASE_URL_PARAM = 'telegram_monitor.api_base_url'
+
 
 class TelegramConfig(models.Model):
     _name = 'telegram.config'
@@ -26,203 +53,502 @@ class TelegramConfig(models.Model):
                                                help='Track when unauthorized users try to add the bot to groups for security audit')
     active = fields.Boolean(string='Active', default=True)
     last_update_id = fields.Integer(string='Last Update ID', default=0, help='Used for polling to avoid duplicate messages')
+    update_mode = fields.Selection([
+        ('polling', 'Polling (getUpdates)'),
+        ('webhook', 'Webhook'),
+    ], string='Update Mode', default='polling', required=True,
+        help='Polling fetches updates with getUpdates. Webhook lets Telegram push every update to this Odoo server; click "Apply Update Mode" after changing it.')
+    webhook_secret = fields.Char('Webhook Secret', copy=False,
+                                 default=lambda self: secrets.token_urlsafe(32),
+                                 help='Sent by Telegram in the X-Telegram-Bot-Api-Secret-Token header of every webhook request')
+    webhook_url = fields.Char('Webhook URL', compute='_compute_webhook_url')
+    message_retention_days = fields.Integer('Message Retention (days)', default=0,
+                                            help='Messages older than this are moved to the message archive every night. Response times and SLA statistics are kept. 0 keeps every message in the live table.')
+    setup_delay_minutes = fields.Integer('Setup Delayed After (minutes)', default=60,
+                                         help='Groups still waiting for admin rights after this long are marked as delayed and reported to the monitoring group.')
+    setup_failure_hours = fields.Integer('Setup Failed After (hours)', default=48,
+                                         help='Groups still waiting for admin rights after this long are marked as failed. 0 never marks them failed.')
+    setup_watchdog_recheck = fields.Boolean('Re-check Admin Rights', default=True,
+                                            help='Let the setup watchdog ask Telegram whether the bot was made admin meanwhile, and complete the setup if so.')
+    offboarding_auto_remove = fields.Boolean('Remove Leavers from Client Groups', default=False,
+                                             help='When someone leaves the team source group, also remove them from the client groups they are still in. '
+                                                  'Otherwise they are only reported to the monitoring group.')
+    journal_retention_days = fields.Integer('Update Journal Retention (days)', default=0,
+                                            help='Raw updates are journaled for replay; older pages are deleted. 0 keeps the whole journal.')
+    sla_response_minutes = fields.Integer('SLA Response Time (minutes)', default=30,
+                                          help='Client messages answered later than this count as SLA breaches. 0 disables breach tracking.')
+    bot_user_id = fields.Char('Bot User ID', readonly=True, copy=False,
+                              help='Telegram user ID of the bot, filled by "Test Connection"')
+    bot_username = fields.Char('Bot Username', readonly=True, copy=False)
     
     # Statistics
     total_messages = fields.Integer(string='Total Messages', compute='_compute_statistics')
     total_groups = fields.Integer(string='Total Groups', compute='_compute_statistics')
     
+    @api.depends('update_mode')
+    def _compute_webhook_url(self):
+        base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url', '')
+        for config in self:
+            config.webhook_url = f"{base_url}/telegram_monitor/webhook/{config.id}" if config.id else False
+    
     @api.depends('active')
     def _compute_statistics(self):
+        # One grouped query for all configurations, reading the groups' stored message counters
+        stats = {
+            config: (group_count, message_count)
+            for config, group_count, message_count in self.env['telegram.group']._read_group(
+                [('config_id', 'in', self.ids)], ['config_id'], ['__count', 'message_count:sum']
+            )
+        }
         for config in self:
-            config.total_groups = self.env['telegram.group'].search_count([('config_id', '=', config.id)])
-            config.total_messages = self.env['telegram.message'].search_count([('group_id.config_id', '=', config.id)])
+            config.total_groups, config.total_messages = stats.get(config._origin, (0, 0))
+    
+    def _get_api_client(self):
+        """Return the shared Telegram API client of this bot"""
+        self.ensure_one()
+        base_url = self.env['ir.config_parameter'].sudo().get_param(API_BASE_URL_PARAM) or TELEGRAM_API_URL
+        return TelegramApiClient.for_token(self.bot_token, base_url)
+    
+    def write(self, vals):
+        if 'bot_token' in vals:
+            # The identity belongs to the old token, fetch it again on next use
+            vals = dict(vals, bot_user_id=False, bot_username=False)
+        return super().write(vals)
+    
+    def _refresh_bot_identity(self):
+        """Call getMe and store the bot's user ID and username"""
+        self.ensure_one()
+        bot_info = self._get_api_client().get_me() or {}
+        self.write({
+            'bot_user_id': str(bot_info.get('id', '')) or False,
+            'bot_username': bot_info.get('username', False),
+        })
+        return bot_info
+    
+    def _get_bot_user_id(self):
+        """Return the bot's own Telegram user ID without calling getMe when known"""
+        self.ensure_one()
+        client = self._get_api_client()
+        if client.bot_info is None:
+            if self.bot_user_id:
+                client.bot_info = {'id': int(self.bot_user_id), 'username': self.bot_username}
+            else:
+                self._refresh_bot_identity()
+        return client.bot_info.get('id')
     
     def test_connection(self):
         """Test the bot connection"""
         self.ensure_one()
-        url = f"https://api.telegram.org/bot{self.bot_token}/getMe"
         
         try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            if data.get('ok'):
-                bot_info = data.get('result', {})
-                return {
-                    'type': 'ir.actions.client',
-                    'tag': 'display_notification',
-                    'params': {
-                        'title': _('Success'),
-                        'message': _('Bot connected successfully! Bot name: %s (@%s)') % (
-                            bot_info.get('first_name', 'Unknown'),
-                            bot_info.get('username', 'unknown')
-                        ),
-                        'type': 'success',
-                        'sticky': False,
-                    }
-                }
-            else:
-                raise UserError(_('Bot connection failed: %s') % data.get('description', 'Unknown error'))
-                
-        except requests.exceptions.RequestException as e:
-            raise UserError(_('Connection error: %s') % str(e))
+            bot_info = self._refresh_bot_identity()
+        except TelegramApiError as e:
+            if e.error_code is None:
+                raise UserError(_('Connection error: %s') % e.description)
+            raise UserError(_('Bot connection failed: %s') % e.description)
+        
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Success'),
+                'message': _('Bot connected successfully! Bot name: %s (@%s)') % (
+                    bot_info.get('first_name', 'Unknown'),
+                    bot_info.get('username', 'unknown')
+                ),
+                'type': 'success',
+                'sticky': False,
+            }
+        }
     
     def send_telegram_message(self, chat_id, message):
         """Send a message to Telegram"""
         self.ensure_one()
-        url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
-        
-        payload = {
-            'chat_id': chat_id,
-            'text': message,
-            'parse_mode': 'HTML'
-        }
         
         try:
-            response = requests.post(url, json=payload, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            return self._get_api_client().send_message(chat_id, message)
+        except TelegramApiError as e:
             _logger.error(f"Error sending Telegram message: {str(e)}")
             raise UserError(_("Failed to send Telegram message: %s") % str(e))
     
     def send_telegram_message_with_keyboard(self, chat_id, message, keyboard):
         """Send a message to Telegram with inline keyboard"""
         self.ensure_one()
-        url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
-        
-        payload = {
-            'chat_id': chat_id,
-            'text': message,
-            'parse_mode': 'HTML',
-            'reply_markup': keyboard
-        }
         
         try:
-            response = requests.post(url, json=payload, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            return self._get_api_client().send_message(chat_id, message, reply_markup=keyboard)
+        except TelegramApiError as e:
             _logger.error(f"Error sending Telegram message with keyboard: {str(e)}")
             raise UserError(_("Failed to send Telegram message: %s") % str(e))
     
+    def action_apply_update_mode(self):
+        """Register or remove the webhook on Telegram according to update_mode"""
+        self.ensure_one()
+        if self.update_mode == 'webhook':
+            if not self.webhook_url.startswith('https://'):
+                raise UserError(_('Telegram only delivers webhooks over HTTPS. Check the web.base.url system parameter (current URL: %s)') % self.webhook_url)
+            if not self.webhook_secret:
+                self.webhook_secret = secrets.token_urlsafe(32)
+        
+        client = self._get_api_client()
+        try:
+            if self.update_mode == 'webhook':
+                client.set_webhook(self.webhook_url, secret_token=self.webhook_secret,
+                                   allowed_updates=ALLOWED_UPDATES)
+            else:
+                client.delete_webhook()
+        except TelegramApiError as e:
+            raise UserError(_('Could not apply update mode: %s') % str(e))
+        
+        _logger.info(f"Update mode {self.update_mode} applied for configuration {self.name}")
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Update Mode Applied'),
+                'message': _('Telegram will push updates to %s') % self.webhook_url
+                           if self.update_mode == 'webhook' else _('Webhook removed, updates are polled again'),
+                'type': 'success',
+            }
+        }
+    
+    def action_regenerate_webhook_secret(self):
+        """Generate a new webhook secret and register it with Telegram"""
+        self.ensure_one()
+        self.webhook_secret = secrets.token_urlsafe(32)
+        if self.update_mode == 'webhook':
+            return self.action_apply_update_mode()
+    
+    def action_show_ingest_cache_stats(self):
+        """Show the hit/miss counters of this worker's ingestion caches"""
+        lines = [
+            f"{stats['name'].capitalize()}s: {stats['size']}/{stats['maxsize']} cached, "
+            f"{stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_ratio']:.0%}), {stats['evictions']} evictions"
+            for stats in ingest_cache.all_stats()
+        ]
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': 'Ingestion Cache (this worker)',
+                'message': '\n'.join(lines),
+                'type': 'info',
+                'sticky': True,
+            }
+        }
+    
     def _generate_invite_link(self, chat_id):
         """Generate invite link for a group"""
         self.ensure_one()
-        url = f"https://api.telegram.org/bot{self.bot_token}/exportChatInviteLink"
-        
-        payload = {'chat_id': chat_id}
         
         try:
-            response = requests.post(url, json=payload, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            if data.get('ok'):
-                return data.get('result')
-            else:
-                _logger.error(f"Failed to generate invite link: {data}")
-                return None
-                
-        except requests.exceptions.RequestException as e:
-            _logger.error(f"Error generating invite link: {str(e)}")
+            return self._get_api_client().export_chat_invite_link(chat_id)
+        except TelegramApiError as e:
+            _logger.error(f"Failed to generate invite link: {str(e)}")
             return None
     
     @api.model
     def poll_telegram_messages(self):
         """Poll for new messages from Telegram (called by scheduled action)"""
-        configs = self.search([('active', '=', True)])
+        if self._poll_worker_is_alive():
+            _logger.debug("Telegram poll worker is running, skipping scheduled poll")
+            return
+        configs = self.search([('active', '=', True), ('update_mode', '=', 'polling')])
         _logger.info(f"Polling Telegram messages for {len(configs)} active configuration(s)")
-        for config in configs:
-            config._fetch_updates()
+        if len(configs) <= 1 or odoo.modules.module.current_test:
+            for config in configs:
+                config._fetch_updates()
+            return
+        
+        # Long polls block for up to LONG_POLL_TIMEOUT seconds, so every
+        # configuration is polled in its own thread and transaction: a slow
+        # or failing bot never holds back the others.
+        with ThreadPoolExecutor(max_workers=min(len(configs), MAX_CONCURRENT_POLLS),
+                                thread_name_prefix='telegram_poll') as executor:
+            for config_id in configs.ids:
+                executor.submit(self._poll_config_in_new_transaction, config_id)
     
-    def _fetch_updates(self):
-        """Fetch updates from Telegram API"""
+    @api.model
+    def _poll_config_in_new_transaction(self, config_id):
+        """Fetch and process one page of updates with a dedicated cursor"""
+        try:
+            with self.pool.cursor() as cr:
+                config = self.with_env(self.env(cr=cr)).browse(config_id)
+                return config._fetch_updates()
+        except Exception:
+            _logger.exception(f"Error polling Telegram for configuration {config_id}")
+    
+    @api.model
+    def _poll_worker_is_alive(self):
+        """Check whether a ``telegram_poll`` worker has reported in recently"""
+        heartbeat = self.env['ir.config_parameter'].sudo().get_param(POLL_WORKER_HEARTBEAT_PARAM)
+        if not heartbeat:
+            return False
+        age = fields.Datetime.now() - fields.Datetime.to_datetime(heartbeat)
+        return age < timedelta(seconds=2 * POLL_WORKER_HEARTBEAT_INTERVAL)
+    
+    @api.model
+    def _poll_worker_heartbeat(self):
+        """Record that a ``telegram_poll`` worker is running"""
+        self.env['ir.config_parameter'].sudo().set_param(
+            POLL_WORKER_HEARTBEAT_PARAM, fields.Datetime.to_string(fields.Datetime.now())
+        )
+    
+    def _fetch_updates(self, timeout=LONG_POLL_TIMEOUT):
+        """Fetch updates from Telegram API
+
+        The page and the new offset are committed together with the caller's
+        transaction, and Telegram only drops updates once they are asked for
+        with a higher offset, so a crash before commit just fetches the page
+        again. Concurrent pollers of the same configuration are kept out by
+        ``_acquire_poll_lease``.
+
+        Returns the number of updates received, or None if the request failed
+        or another transaction is polling this configuration.
+        """
         self.ensure_one()
-        url = f"https://api.telegram.org/bot{self.bot_token}/getUpdates"
         
-        params = {
-            'offset': self.last_update_id + 1 if self.last_update_id else None,
-            'timeout': 25,
-            'allowed_updates': ['message', 'channel_post', 'my_chat_member', 'chat_member', 'callback_query']
-        }
+        if not self._acquire_poll_lease():
+            _logger.debug(f"Configuration {self.id} is being polled by another worker, skipping")
+            return None
         
         try:
-            response = requests.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-            
-            if data.get('ok') and data.get('result'):
-                _logger.info(f"Received {len(data['result'])} update(s) from Telegram")
-                self._process_updates(data['result'])
-            else:
-                _logger.warning(f"Telegram API returned no updates or error: {data}")
-                
-        except requests.exceptions.RequestException as e:
+            updates = self._get_api_client().get_updates(
+                offset=self.last_update_id + 1 if self.last_update_id else None,
+                timeout=timeout,
+                allowed_updates=ALLOWED_UPDATES,
+            )
+        except TelegramApiError as e:
             _logger.error(f"Error fetching Telegram updates: {str(e)}")
+            return None
+        
+        if updates:
+            _logger.debug(f"Received {len(updates)} update(s) from Telegram")
+            self._process_updates(updates)
+        else:
+            _logger.debug("Telegram API returned no updates")
+        return len(updates or [])
     
-    def _process_updates(self, updates):
-        """Process received updates and store messages"""
+    def _acquire_poll_lease(self):
+        """Reserve this configuration for polling until the transaction ends
+
+        Takes a transaction-level advisory lock, so a crashed worker never
+        leaves a stale lease behind. Odoo transactions run in REPEATABLE READ:
+        one that started before the previous lease holder committed would
+        still see the old offset and fetch the same page again, so the offset
+        it sees is checked against the committed one.
+        """
         self.ensure_one()
+        self.env.cr.execute("SELECT pg_try_advisory_xact_lock(%s, %s)", [POLL_LOCK_NAMESPACE, self.id])
+        if not self.env.cr.fetchone()[0]:
+            return False
+        self.invalidate_recordset(['last_update_id'])
+        with self.pool.cursor() as cr:
+            cr.execute("SELECT last_update_id FROM telegram_config WHERE id = %s", [self.id])
+            committed = cr.fetchone()
+        return bool(committed) and (committed[0] or 0) == (self.last_update_id or 0)
+    
+    def _process_updates(self, updates, journal=True, update_offset=True):
+        """Process received updates and store messages
+
+        Plain group messages are buffered and stored in batches by
+        ``_ingest_message_batch``. Any other kind of update flushes the buffer
+        first, so handlers see the database in the same state as if every
+        update had been processed one at a time.
+
+        Every update (and every batch) runs in its own savepoint. An update
+        that fails is rolled back alone and kept in ``telegram.dead.letter``
+        for replay, so it neither aborts the rest of the page nor gets lost
+        once ``last_update_id`` has moved past it. The offset is written once,
+        after the whole page was stored, and only when ``update_offset`` is
+        set: webhook deliveries and replays leave the configuration row alone,
+        so concurrent deliveries do not conflict on it.
+
+        Each update is counted in ``tools/metrics.py`` by type and outcome,
+        with its duration and SQL query count, and the metrics of this process
+        are published for the other workers once the page is done.
+
+        The raw page is kept in ``telegram.update.journal`` unless
+        ``journal`` is False (replays of the journal itself).
+        """
+        self.ensure_one()
+        
+        if journal:
+            self.env['telegram.update.journal']._append(self, updates)
         
+        batch = []
+        last_update_id = self.last_update_id or 0
         for update in updates:
+            last_update_id = max(last_update_id, update.get('update_id') or 0)
+            kind = metrics.update_type(update)
+            if kind in ('callback_query', 'my_chat_member', 'chat_member', 'member_message'):
+                batch = self._flush_message_batch(batch)
+            
+            started = time.perf_counter()
+            queries = self.env.cr.sql_log_count
             try:
-                # Update the last_update_id
-                if update.get('update_id', 0) > (self.last_update_id or 0):
-                    self.last_update_id = update['update_id']
-                
-                # Handle callback queries (button clicks)
-                if update.get('callback_query'):
-                    self._handle_callback_query(update['callback_query'])
-                    continue
-                
-                # Handle bot being added to group
-                if update.get('my_chat_member'):
-                    self._handle_bot_status_change(update['my_chat_member'])
-                    continue
-                
-                # Handle member status changes (joins/leaves)
-                if update.get('chat_member'):
-                    self._handle_member_status_change(update['chat_member'])
-                    continue
-                
-                # Get message data
-                message_data = update.get('message') or update.get('channel_post')
-                if not message_data:
-                    continue
-                
-                # Handle new members joining
-                if message_data.get('new_chat_members'):
-                    self._handle_new_members(message_data)
-                
-                # Handle member leaving
-                if message_data.get('left_chat_member'):
-                    self._handle_member_left(message_data)
-                
-                # Extract chat and user information
-                chat_data = message_data.get('chat', {})
-                from_data = message_data.get('from', {})
-                
-                # Skip if not a group/supergroup
-                if chat_data.get('type') not in ['group', 'supergroup']:
-                    _logger.debug(f"Skipping message from non-group chat: {chat_data.get('type')}")
-                    continue
-                
-                # Find or create group
-                group = self._find_or_create_group(chat_data)
-                if not group:
-                    continue
-                
-                # Find or create member
-                member = self._find_or_create_member(from_data, group)
-                
-                # Store the message
-                self._store_message(message_data, group, member)
-                
+                with self.env.cr.savepoint():
+                    outcome = self._dispatch_update(update, batch)
             except Exception as e:
                 _logger.error(f"Error processing update {update.get('update_id')}: {str(e)}")
+                self.env['telegram.dead.letter']._record(self, update, e)
+                outcome = 'failed'
+            
+            # Buffered messages are measured when the batch is stored
+            if outcome != 'batched':
+                self._record_update_metrics(kind, outcome, time.perf_counter() - started,
+                                            self.env.cr.sql_log_count - queries)
+        
+        self._flush_message_batch(batch)
+        if update_offset and last_update_id != (self.last_update_id or 0):
+            self.last_update_id = last_update_id
+        metrics.publish()
+    
+    def _dispatch_update(self, update, batch):
+        """Handle one update, or append it to ``batch`` if it has a message to store
+
+        Returns the outcome: ``handled``, ``skipped`` or ``batched``.
+        """
+        # Handle callback queries (button clicks)
+        if update.get('callback_query'):
+            self._handle_callback_query(update['callback_query'])
+            return 'handled'
+        
+        # Handle bot being added to group
+        if update.get('my_chat_member'):
+            self._handle_bot_status_change(update['my_chat_member'])
+            return 'handled'
+        
+        # Handle member status changes (joins/leaves)
+        if update.get('chat_member'):
+            self._handle_member_status_change(update['chat_member'])
+            return 'handled'
+        
+        # Get message data
+        message_data = update.get('message') or update.get('channel_post')
+        if not message_data:
+            return 'skipped'
+        
+        handled = False
+        # Handle new members joining
+        if message_data.get('new_chat_members'):
+            self._handle_new_members(message_data)
+            handled = True
+        
+        # Handle member leaving
+        if message_data.get('left_chat_member'):
+            self._handle_member_left(message_data)
+            handled = True
+        
+        # Skip if not a group/supergroup
+        chat_data = message_data.get('chat', {})
+        if chat_data.get('type') not in ['group', 'supergroup']:
+            _logger.debug(f"Skipping message from non-group chat: {chat_data.get('type')}")
+            return 'handled' if handled else 'skipped'
+        
+        batch.append(update)
+        # A join/leave message is measured here for the membership change
+        # and once more as a message when the batch is stored
+        return 'handled' if handled else 'batched'
+    
+    def _flush_message_batch(self, batch):
+        """Store the messages of the buffered updates and return a new, empty buffer
+
+        If the batch fails, its updates are stored again one by one so only
+        the faulty ones end up in ``telegram.dead.letter``.
+        """
+        if not batch:
+            return []
+        messages_data = [update.get('message') or update.get('channel_post') for update in batch]
+        started = time.perf_counter()
+        queries = self.env.cr.sql_log_count
+        try:
+            with self.env.cr.savepoint():
+                self._ingest_message_batch(messages_data)
+        except Exception as e:
+            if len(batch) > 1:
+                _logger.warning(f"Error storing batch of {len(batch)} message(s), storing them one by one: {str(e)}")
+                for update in batch:
+                    self._flush_message_batch([update])
+                return []
+            _logger.error(f"Error storing message of update {batch[0].get('update_id')}: {str(e)}")
+            self.env['telegram.dead.letter']._record(self, batch[0], e)
+            self._record_update_metrics('message', 'failed', time.perf_counter() - started,
+                                        self.env.cr.sql_log_count - queries)
+            return []
+        
+        self._record_update_metrics('message', 'handled', time.perf_counter() - started,
+                                    self.env.cr.sql_log_count - queries, count=len(batch))
+        now = time.time()
+        for message_data in messages_data:
+            if message_data.get('date'):
+                metrics.POLL_LAG.observe(max(now - message_data['date'], 0), config=self.id)
+        return []
+    
+    def _replay_update(self, update):
+        """Process a single update again, raising on failure (see telegram.dead.letter)"""
+        self.ensure_one()
+        batch = []
+        self._dispatch_update(update, batch)
+        if batch:
+            self._ingest_message_batch([update.get('message') or update.get('channel_post')])
+    
+    def _record_update_metrics(self, kind, outcome, duration, queries, count=1):
+        """Count ``count`` updates of one kind, sharing the duration and queries"""
+        metrics.UPDATES.inc(count, config=self.id, type=kind, outcome=outcome)
+        metrics.UPDATE_DURATION.observe(duration / count, amount=count, type=kind)
+        metrics.UPDATE_QUERIES.observe(queries / count, amount=count, type=kind)
+    
+    def _ingest_message_batch(self, messages_data):
+        """Store a list of group messages with a fixed number of queries
+
+        Groups, members and already stored messages are each resolved with
+        a single query (or from the ingestion caches) and new messages are
+        inserted with one create; messages already stored are skipped.
+        Replays (``telegram_replay`` context key) also skip the messages
+        moved to ``telegram.message.archive`` since they were first stored.
+        """
+        self.ensure_one()
+        Message = self.env['telegram.message']
+        
+        groups = self._find_or_create_groups([m.get('chat', {}) for m in messages_data])
+        members = self._find_or_create_members([
+            (m.get('from'), groups[str(m.get('chat', {}).get('id'))])
+            for m in messages_data if m.get('from')
+        ])
+        
+        # Skip messages that are already stored (one IN query for the page)
+        message_ids = {str(m.get('message_id')) for m in messages_data}
+        existing = Message.search_read([
+            ('message_id', 'in', list(message_ids)),
+            ('group_id', 'in', [g.id for g in groups.values()]),
+        ], ['message_id', 'group_id'])
+        seen = {(rec['message_id'], rec['group_id'][0]) for rec in existing}
+        if self.env.context.get('telegram_replay'):
+            seen |= self.env['telegram.message.archive']._get_archived_keys(
+                message_ids, [g.id for g in groups.values()])
+        
+        vals_list = []
+        for message_data in messages_data:
+            message_id = str(message_data.get('message_id'))
+            group = groups[str(message_data.get('chat', {}).get('id'))]
+            if (message_id, group.id) in seen:
+                _logger.debug(f"Message {message_id} already exists, skipping")
                 continue
+            seen.add((message_id, group.id))
+            
+            from_data = message_data.get('from')
+            member = members.get((str(from_data.get('id')), group.id)) if from_data else None
+            if not member:
+                _logger.error(f"Error storing message {message_id} in {group.name}: message has no sender")
+                continue
+            vals_list.append(self._prepare_message_values(message_data, group, member))
+        
+        messages = Message.create(vals_list)
+        for message in messages:
+            _logger.debug(f"✅ Stored message {message.message_id} from {message.member_id.name} in {message.group_id.name}")
+        return messages
     
     def _handle_bot_status_change(self, chat_member_data):
         """Handle bot being added/removed from group"""
@@ -233,6 +559,12 @@ class TelegramConfig(models.Model):
         bot_user = chat_member_data.get('new_chat_member', {}).get('user', {})
         bot_id = bot_user.get('id')
         
+        # The update carries the bot's new status, keep it for admin checks
+        if bot_id and chat_data.get('id'):
+            self._get_api_client().cache_chat_member(
+                chat_data['id'], bot_id, chat_member_data['new_chat_member']
+            )
+        
         # Bot was added to group (as member, not admin yet)
         if old_status in ['left', 'kicked'] and new_status == 'member':
             from_telegram_id = str(from_user.get('id', ''))
@@ -278,30 +610,10 @@ class TelegramConfig(models.Model):
                 # Generate invite link
                 invite_link = self._generate_invite_link(group.chat_id)
                 if invite_link:
-                    setup_duration = 0
-                    if group.setup_started_at:
-                        duration = fields.Datetime.now() - group.setup_started_at
-                        setup_duration = int(duration.total_seconds() / 60)  # Convert to minutes
-                    
-                    group.write({
-                        'invite_link': invite_link,
-                        'invite_link_created_at': fields.Datetime.now(),
-                        'needs_setup': False,
-                        'setup_completed_at': fields.Datetime.now(),
-                        'setup_status': 'complete',
-                        'setup_duration': setup_duration,
-                    })
+                    setup_duration = self._mark_setup_complete(group, invite_link)
                     
                     # Send welcome message with invite link
-                    welcome_msg = f"""🤖 <b>Bot Activated for {group.name}!</b>
-
-📎 <b>Invite Link:</b>
-{invite_link}
-
-Share this link to add members to this group.
-I'll automatically track team members vs clients! 📊"""
-                    
-                    self.send_telegram_message(group.chat_id, welcome_msg)
+                    self._send_activation_message(group, invite_link)
                     
                     # Send completion alert to monitoring group
                     self._send_monitoring_alert_setup_complete(group, setup_duration)
@@ -334,19 +646,7 @@ I'll automatically track team members vs clients! 📊"""
                 # Bot is admin - generate invite link
                 invite_link = self._generate_invite_link(chat_id)
                 if invite_link and group:
-                    setup_duration = 0
-                    if group.setup_started_at:
-                        duration = fields.Datetime.now() - group.setup_started_at
-                        setup_duration = int(duration.total_seconds() / 60)
-                    
-                    group.write({
-                        'invite_link': invite_link,
-                        'invite_link_created_at': fields.Datetime.now(),
-                        'needs_setup': False,
-                        'setup_completed_at': fields.Datetime.now(),
-                        'setup_status': 'complete',
-                        'setup_duration': setup_duration,
-                    })
+                    setup_duration = self._mark_setup_complete(group, invite_link)
                     
                     success_msg = f"""🎉 <b>Perfect! Setup Complete!</b>
 
@@ -356,7 +656,7 @@ I'll automatically track team members vs clients! 📊"""
 Share this link to add members to this group.
 I'm now monitoring this group! 📊"""
                     
-                    self.send_telegram_message(chat_id, success_msg)
+                    self._enqueue_telegram_message(chat_id, success_msg)
                     
                     # Send completion alert to monitoring group
                     self._send_monitoring_alert_setup_complete(group, setup_duration)
@@ -384,7 +684,7 @@ Try again when ready:"""
                     ]]
                 }
                 
-                self.send_telegram_message_with_keyboard(chat_id, reminder_msg, keyboard)
+                self._enqueue_telegram_message(chat_id, reminder_msg, reply_markup=keyboard)
                 
                 # Update monitoring group - setup attempted but failed
                 if group:
@@ -395,52 +695,163 @@ Try again when ready:"""
                 # Answer callback query
                 self._answer_callback_query(query_id, "⚠️ Not admin yet - please check permissions")
     
+    def _mark_setup_complete(self, group, invite_link):
+        """Record that the bot is admin in ``group``; returns the setup time in minutes"""
+        setup_duration = self._get_pending_duration(group)
+        group.write({
+            'invite_link': invite_link,
+            'invite_link_created_at': fields.Datetime.now(),
+            'needs_setup': False,
+            'setup_completed_at': fields.Datetime.now(),
+            'setup_status': 'complete',
+            'setup_duration': setup_duration,
+        })
+        return setup_duration
+    
+    def _send_activation_message(self, group, invite_link):
+        """Send the welcome message with the invite link to a group whose setup completed"""
+        welcome_msg = f"""🤖 <b>Bot Activated for {group.name}!</b>
+
+📎 <b>Invite Link:</b>
+{invite_link}
+
+Share this link to add members to this group.
+I'll automatically track team members vs clients! 📊"""
+        
+        self._enqueue_telegram_message(group.chat_id, welcome_msg)
+    
+    @api.model
+    def _cron_setup_watchdog(self):
+        """Escalate groups whose setup has been pending for too long (called by scheduled action)
+
+        A single query on the setup-pending index finds the overdue groups of
+        every active configuration, so the cost follows the number of pending
+        groups. Per configuration, groups where the bot meanwhile became admin
+        are completed, the others are marked delayed or failed in bulk, and
+        one digest goes to the monitoring group.
+        """
+        configs = self.search([('active', '=', True)])
+        if not configs:
+            return
+        now = fields.Datetime.now()
+        self.env['telegram.group'].flush_model(['setup_status', 'setup_started_at', 'config_id'])
+        self.env.cr.execute("""
+            SELECT g.id,
+                   c.setup_failure_hours > 0
+                   AND g.setup_started_at <= %(now)s - make_interval(hours => c.setup_failure_hours) AS overdue
+              FROM telegram_group g
+              JOIN telegram_config c ON c.id = g.config_id
+             WHERE g.setup_status IN ('pending', 'delayed')
+               AND g.setup_started_at <= %(bound)s
+               AND g.setup_started_at <= %(now)s - make_interval(mins => c.setup_delay_minutes)
+               AND c.id IN %(config_ids)s
+        """, {
+            'now': now,
+            'bound': now - timedelta(minutes=min(configs.mapped('setup_delay_minutes'))),
+            'config_ids': tuple(configs.ids),
+        })
+        overdue = dict(self.env.cr.fetchall())
+        if not overdue:
+            return
+        groups = self.env['telegram.group'].browse(list(overdue))
+        for config, config_groups in groups.grouped('config_id').items():
+            # A revoked token or an unreachable API must not stop the other configurations
+            try:
+                with self.env.cr.savepoint():
+                    config._escalate_pending_setups(config_groups, {g.id for g in config_groups if overdue[g.id]})
+            except TelegramApiError as e:
+                _logger.error(f"Setup watchdog failed for configuration {config.name}: {str(e)}")
+    
+    def _escalate_pending_setups(self, groups, overdue_ids):
+        """Complete, delay or fail the stale pending ``groups`` of this configuration"""
+        self.ensure_one()
+        recovered = self.env['telegram.group']
+        if self.setup_watchdog_recheck:
+            for group, is_admin in zip(groups, self._check_bot_admin_statuses(groups.mapped('chat_id'))):
+                if is_admin:
+                    invite_link = self._generate_invite_link(group.chat_id)
+                    if invite_link:
+                        self._mark_setup_complete(group, invite_link)
+                        self._send_activation_message(group, invite_link)
+                        recovered |= group
+        
+        remaining = groups - recovered
+        failed = remaining.filtered(lambda g: g.id in overdue_ids and g.setup_status != 'failed')
+        delayed = remaining.filtered(lambda g: g.id not in overdue_ids and g.setup_status == 'pending')
+        failed.write({'setup_status': 'failed'})
+        delayed.write({'setup_status': 'delayed'})
+        
+        if recovered or failed or delayed:
+            _logger.info(f"Setup watchdog for {self.name}: {len(recovered)} completed, "
+                         f"{len(delayed)} delayed, {len(failed)} failed")
+            self._send_monitoring_alert_setup_watchdog(recovered, delayed, failed)
+    
+    def _check_bot_admin_statuses(self, chat_ids):
+        """Check the bot's admin rights in several chats in parallel
+
+        Only Telegram is called from the worker threads; returns a list of
+        booleans in the order of ``chat_ids`` (False when the check failed).
+        """
+        self.ensure_one()
+        if not chat_ids:
+            return []
+        bot_user_id = self._get_bot_user_id()
+        statuses = self._get_chat_member_statuses([(chat_id, bot_user_id) for chat_id in chat_ids])
+        return [status == 'administrator' for status in statuses]
+    
+    def _get_chat_member_statuses(self, pairs):
+        """Call getChatMember for several ``(chat_id, user_id)`` pairs in parallel
+
+        Only Telegram is called from the worker threads. Returns the
+        statuses in the order of ``pairs``: 'left' when Telegram does not
+        know the user in the chat, None when the check failed (logged).
+        """
+        self.ensure_one()
+        if not pairs:
+            return []
+        client = self._get_api_client()
+        
+        def get_status(pair):
+            chat_id, user_id = pair
+            try:
+                chat_member = client.get_chat_member(chat_id, user_id, max_age=CHAT_MEMBER_CACHE_TTL) or {}
+            except TelegramApiError as e:
+                # Telegram does not know the user in this chat (any more)
+                if e.error_code == 400 and any(
+                        text in e.description for text in ('user not found', 'PARTICIPANT_ID_INVALID')):
+                    return 'left'
+                _logger.warning(f"Could not get member {user_id} of chat {chat_id}: {str(e)}")
+                return None
+            return chat_member.get('status')
+        
+        with ThreadPoolExecutor(max_workers=min(len(pairs), MAX_CONCURRENT_CHAT_MEMBER_CHECKS),
+                                thread_name_prefix='telegram_chat_member') as executor:
+            return list(executor.map(get_status, pairs))
+    
     def _answer_callback_query(self, query_id, text):
         """Answer a callback query (acknowledge button click)"""
         self.ensure_one()
-        url = f"https://api.telegram.org/bot{self.bot_token}/answerCallbackQuery"
-        
-        payload = {
-            'callback_query_id': query_id,
-            'text': text,
-            'show_alert': False
-        }
         
         try:
-            response = requests.post(url, json=payload, timeout=10)
-            response.raise_for_status()
-        except Exception as e:
+            self._get_api_client().answer_callback_query(query_id, text)
+        except TelegramApiError as e:
             _logger.error(f"Failed to answer callback query: {str(e)}")
     
     def _check_bot_admin_status(self, chat_id):
         """Check if bot is an administrator in the group"""
         self.ensure_one()
-        url = f"https://api.telegram.org/bot{self.bot_token}/getChatMember"
-        
-        # Get bot's own user ID first
-        me_url = f"https://api.telegram.org/bot{self.bot_token}/getMe"
         
         try:
-            me_response = requests.get(me_url, timeout=10)
-            me_data = me_response.json()
-            bot_user_id = me_data.get('result', {}).get('id')
+            # Bot's own user ID is cached, see _get_bot_user_id
+            bot_user_id = self._get_bot_user_id()
             
             # Now check bot's status in the group
-            payload = {
-                'chat_id': chat_id,
-                'user_id': bot_user_id
-            }
-            
-            response = requests.post(url, json=payload, timeout=10)
-            data = response.json()
-            
-            if data.get('ok'):
-                status = data.get('result', {}).get('status')
-                return status == 'administrator'
-            
-            return False
+            chat_member = self._get_api_client().get_chat_member(
+                chat_id, bot_user_id, max_age=CHAT_MEMBER_CACHE_TTL
+            ) or {}
+            return chat_member.get('status') == 'administrator'
             
-        except Exception as e:
+        except TelegramApiError as e:
             _logger.error(f"Error checking bot admin status: {str(e)}")
             return False
     
@@ -473,16 +884,13 @@ Sorry, only authorized team members can add this bot to groups.
 
 If you believe this is an error, please contact your administrator."""
         
-        try:
-            self.send_telegram_message(chat_data.get('id'), warning_msg)
-        except:
-            _logger.error("Failed to send unauthorized message")
+        self._enqueue_telegram_message(chat_data.get('id'), warning_msg)
         
         # Log attempt if enabled
         if self.log_unauthorized_attempts:
             self._log_unauthorized_attempt(telegram_id, user_name, chat_data)
         
-        # Leave the group
+        # Leave the group (queued after the warning, so it is sent first)
         self._leave_group(chat_data.get('id'))
         
         return False
@@ -508,22 +916,14 @@ If you believe this is an error, please contact your administrator."""
     def _leave_group(self, chat_id):
         """Make bot leave a group"""
         self.ensure_one()
-        url = f"https://api.telegram.org/bot{self.bot_token}/leaveChat"
-        
-        payload = {'chat_id': chat_id}
-        
-        try:
-            response = requests.post(url, json=payload, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            if data.get('ok'):
-                _logger.info(f"✅ Bot left group {chat_id}")
-            else:
-                _logger.error(f"Failed to leave group: {data}")
-                
-        except requests.exceptions.RequestException as e:
-            _logger.error(f"Error leaving group: {str(e)}")
+        self.env['telegram.outbound.message']._enqueue(self, chat_id, method='leave_chat')
+    
+    def _enqueue_telegram_message(self, chat_id, message, reply_markup=None, kind='message'):
+        """Queue a message for the outbound dispatcher (see telegram.outbound.message)"""
+        self.ensure_one()
+        return self.env['telegram.outbound.message']._enqueue(
+            self, chat_id, text=message, reply_markup=reply_markup, kind=kind
+        )
     
     def _send_setup_incomplete_message(self, chat_id, bot_id, user_name):
         """Send setup instructions when bot is added without admin rights"""
@@ -551,11 +951,8 @@ When finished, click the button below:"""
             ]]
         }
         
-        try:
-            self.send_telegram_message_with_keyboard(chat_id, message, keyboard)
-            _logger.info(f"📤 Sent setup instructions to chat {chat_id}")
-        except Exception as e:
-            _logger.error(f"Failed to send setup instructions: {str(e)}")
+        self._enqueue_telegram_message(chat_id, message, reply_markup=keyboard)
+        _logger.info(f"📤 Queued setup instructions for chat {chat_id}")
     
     def _send_monitoring_alert_new_group(self, group, creator_name, creator_username, creator_telegram_id):
         """Send alert to monitoring group when new group is created"""
@@ -577,14 +974,28 @@ When finished, click the button below:"""
 Group ID: {group.chat_id}
 Creator ID: {creator_telegram_id}"""
         
-        try:
-            self.send_telegram_message(
-                self.monitoring_alerts_group_id.chat_id,
-                message
-            )
-            _logger.info(f"📤 Sent new group alert to monitoring group for {group.name}")
-        except Exception as e:
-            _logger.error(f"Failed to send monitoring alert: {str(e)}")
+        self._enqueue_telegram_message(self.monitoring_alerts_group_id.chat_id, message, kind='alert')
+        _logger.info(f"📤 Queued new group alert to monitoring group for {group.name}")
+    
+    def _send_monitoring_alert_team_changes(self, diff):
+        """Send alert to monitoring group when the team reconciliation changed something"""
+        self.ensure_one()
+        
+        if not self.monitoring_alerts_group_id:
+            return  # No monitoring group configured
+        
+        lines = [
+            f"{icon} <b>{label}:</b> {', '.join(diff[key])}"
+            for key, icon, label in [
+                ('joined', '➕', 'Joined team group'), ('left', '➖', 'Left team group'),
+                ('added', '🆕', 'New team members'), ('reactivated', '🔄', 'Reactivated'),
+                ('deactivated', '⚠️', 'Deactivated'),
+            ] if diff.get(key)
+        ]
+        message = "👥 <b>TEAM MEMBERS RECONCILED</b>\n\n" + "\n".join(lines)
+        
+        self._enqueue_telegram_message(self.monitoring_alerts_group_id.chat_id, message, kind='alert')
+        _logger.info(f"📤 Queued team reconciliation alert to monitoring group for {self.team_source_group_id.name}")
     
     def _send_monitoring_alert_setup_complete(self, group, setup_duration):
         """Send alert to monitoring group when setup is completed"""
@@ -603,14 +1014,8 @@ Creator ID: {creator_telegram_id}"""
 
 Group ID: {group.chat_id}"""
         
-        try:
-            self.send_telegram_message(
-                self.monitoring_alerts_group_id.chat_id,
-                message
-            )
-            _logger.info(f"📤 Sent setup complete alert to monitoring group for {group.name}")
-        except Exception as e:
-            _logger.error(f"Failed to send monitoring alert: {str(e)}")
+        self._enqueue_telegram_message(self.monitoring_alerts_group_id.chat_id, message, kind='alert')
+        _logger.info(f"📤 Queued setup complete alert to monitoring group for {group.name}")
     
     def _send_monitoring_alert_setup_failed_attempt(self, group, user_name):
         """Send alert when user tries to complete setup but bot is not admin"""
@@ -628,14 +1033,54 @@ Group ID: {group.chat_id}"""
 
 User clicked "I Made You Admin" but permissions not granted yet."""
         
-        try:
-            self.send_telegram_message(
-                self.monitoring_alerts_group_id.chat_id,
-                message
-            )
-            _logger.info(f"📤 Sent failed setup attempt alert for {group.name}")
-        except Exception as e:
-            _logger.error(f"Failed to send monitoring alert: {str(e)}")
+        self._enqueue_telegram_message(self.monitoring_alerts_group_id.chat_id, message, kind='alert')
+        _logger.info(f"📤 Queued failed setup attempt alert for {group.name}")
+    
+    def _send_monitoring_alert_setup_watchdog(self, completed, delayed, failed):
+        """Send one digest of the groups the setup watchdog completed, delayed or failed"""
+        self.ensure_one()
+        
+        if not self.monitoring_alerts_group_id:
+            return
+        
+        sections = []
+        for title, groups in [('✅ <b>Completed (bot is admin now):</b>', completed),
+                              ('⏳ <b>Setup delayed:</b>', delayed),
+                              ('❌ <b>Setup failed:</b>', failed)]:
+            if groups:
+                lines = [f"• {group.name} ({self._get_pending_duration(group)} min, added by {group.created_by_name or 'unknown'})"
+                         for group in groups]
+                sections.append(title + "\n" + "\n".join(lines))
+        message = "🕵️ <b>SETUP WATCHDOG</b>\n\n" + "\n\n".join(sections)
+        
+        self._enqueue_telegram_message(self.monitoring_alerts_group_id.chat_id, message, kind='alert')
+        _logger.info(f"📤 Queued setup watchdog digest for {self.name}")
+    
+    def _send_monitoring_alert_offboarding(self, memberships):
+        """Send one alert listing the client groups that former team members are still in"""
+        self.ensure_one()
+        
+        if not self.monitoring_alerts_group_id:
+            return
+        
+        lines = []
+        for telegram_id, members in memberships.grouped('telegram_id').items():
+            member = members[0]
+            name = f"{member.name} (@{member.username})" if member.username else member.name
+            lines.append(f"• {name}: {', '.join(members.group_id.mapped('name'))}")
+        if len(lines) > OFFBOARDING_ALERT_MAX_USERS:
+            lines[OFFBOARDING_ALERT_MAX_USERS:] = [f"… and {len(lines) - OFFBOARDING_ALERT_MAX_USERS} more"]
+        action = ('🚪 <b>Action:</b> Removal queued' if self.offboarding_auto_remove
+                  else '🚪 <b>Action:</b> Review the Offboarding Report and remove them')
+        message = f"""🔐 <b>TEAM MEMBER OFFBOARDING</b>
+
+Former team members still in client groups ({len(memberships)} memberships):
+{chr(10).join(lines)}
+
+{action}"""
+        
+        self._enqueue_telegram_message(self.monitoring_alerts_group_id.chat_id, message, kind='alert')
+        _logger.info(f"📤 Queued offboarding alert to monitoring group for {len(memberships)} memberships")
     
     def _get_pending_duration(self, group):
         """Calculate how long setup has been pending"""
@@ -723,10 +1168,7 @@ User clicked "I Made You Admin" but permissions not granted yet."""
     def _process_member_join(self, user_data, group):
         """Process a member joining a group"""
         telegram_id = str(user_data.get('id'))
-        username = user_data.get('username', '')
-        first_name = user_data.get('first_name', '')
-        last_name = user_data.get('last_name', '')
-        display_name = ' '.join(filter(None, [first_name, last_name])) or username or 'Unknown'
+        user = self.env['telegram.user']._sync_profiles([user_data])[telegram_id]
         
         # Find or create member in this group
         member = self.env['telegram.member'].search([
@@ -736,16 +1178,13 @@ User clicked "I Made You Admin" but permissions not granted yet."""
         
         if member:
             member.write({'is_active': True, 'left_date': False})
-            _logger.info(f"✅ {display_name} re-joined {group.name}")
+            _logger.debug(f"✅ {user.name} re-joined {group.name}")
         else:
             member = self.env['telegram.member'].create({
-                'name': display_name,
-                'telegram_id': telegram_id,
-                'username': username,
+                'user_id': user.id,
                 'group_id': group.id,
-                'is_bot': user_data.get('is_bot', False),
             })
-            _logger.info(f"✅ New member {display_name} joined {group.name}")
+            _logger.debug(f"✅ New member {user.name} joined {group.name}")
         
         # If this is the team source group, register as team member
         if self.team_source_group_id and group.id == self.team_source_group_id.id:
@@ -763,7 +1202,7 @@ User clicked "I Made You Admin" but permissions not granted yet."""
                 'is_active': False,
                 'left_date': fields.Datetime.now()
             })
-            _logger.info(f"👋 {member.name} left {group.name}")
+            _logger.debug(f"👋 {member.name} left {group.name}")
             
             # If this is the team source group, deactivate team member
             if self.team_source_group_id and group.id == self.team_source_group_id.id:
@@ -802,87 +1241,180 @@ User clicked "I Made You Admin" but permissions not granted yet."""
         if team_member:
             team_member.write({'is_active': False})
             _logger.info(f"⚠️ Deactivated team member: {team_member.name}")
-            
-            # TODO Phase 2: Check if member is still in other client groups
-            # Alert Tier 1 Response Group for member removal approval
+            # A replayed departure was already reported when it happened
+            if not self.env.context.get('telegram_replay'):
+                self._offboard_team_members(team_member)
+    
+    def _get_offboarding_memberships(self, team_members):
+        """Return the client group memberships the given team members still hold
+
+        One lookup on the active ``telegram_id`` index of ``telegram.member``,
+        restricted to this configuration's groups other than the team source
+        and monitoring groups.
+        """
+        self.ensure_one()
+        return self.env['telegram.member']._get_active_memberships(team_members.mapped('telegram_id'), [
+            ('group_id.config_id', '=', self.id),
+            ('group_id', 'not in', (self.team_source_group_id | self.monitoring_alerts_group_id).ids),
+        ])
+    
+    def _offboard_team_members(self, team_members):
+        """Report the client groups that team members who left are still in
+
+        Sends one alert to the monitoring group and, when
+        ``offboarding_auto_remove`` is set, queues their removal.
+        """
+        self.ensure_one()
+        memberships = self._get_offboarding_memberships(team_members)
+        if not memberships:
+            return memberships
+        _logger.info(f"⚠️ {len(team_members)} former team member(s) still in {len(memberships.group_id)} client group(s)")
+        self._send_monitoring_alert_offboarding(memberships)
+        if self.offboarding_auto_remove:
+            memberships._queue_removal()
+        return memberships
+    
+    def action_offboarding_report(self):
+        """List the client group memberships of every former team member"""
+        self.ensure_one()
+        former = self.env['telegram.team.member'].search([('is_active', '=', False)])
+        memberships = self._get_offboarding_memberships(former)
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Offboarding Report'),
+            'res_model': 'telegram.member',
+            'view_mode': 'list',
+            'views': [(self.env.ref('telegram_monitor.view_telegram_member_offboarding_list').id, 'list')],
+            'domain': [('id', 'in', memberships.ids)],
+            'context': {'create': False},
+        }
     
     def _find_or_create_group(self, chat_data):
         """Find or create a Telegram group"""
-        chat_id = str(chat_data.get('id'))
-        group = self.env['telegram.group'].search([
-            ('chat_id', '=', chat_id),
-            ('config_id', '=', self.id)
-        ], limit=1)
+        return self._find_or_create_groups([chat_data])[str(chat_data.get('id'))]
+    
+    def _find_or_create_groups(self, chats_data):
+        """Find or create the Telegram groups of several chats at once
+
+        Returns a dict mapping the chat ID (as a string) to its group record.
+        Known chats are resolved from the process-level ``GROUP_CACHE``.
+        """
+        self.ensure_one()
+        Group = self.env['telegram.group']
+        dbname = self.env.cr.dbname
+        ingest_cache.check_signals(self.env.cr, self.env.registry)
+        
+        chats = {}
+        for chat_data in chats_data:
+            chats.setdefault(str(chat_data.get('id')), chat_data)
+        
+        groups = {}
+        for chat_id in chats:
+            group_id = ingest_cache.GROUP_CACHE.get((dbname, self.id, chat_id))
+            if group_id:
+                groups[chat_id] = Group.browse(group_id)
+        
+        uncached = [chat_id for chat_id in chats if chat_id not in groups]
+        if uncached:
+            found = Group.search([
+                ('chat_id', 'in', uncached),
+                ('config_id', '=', self.id)
+            ])
+            for group in found:
+                groups[group.chat_id] = group
+            ingest_cache.update_after_commit(self.env.cr, ingest_cache.GROUP_CACHE, {
+                (dbname, self.id, group.chat_id): group.id for group in found
+            })
         
-        if not group:
-            group = self.env['telegram.group'].create({
-                'name': chat_data.get('title', 'Unknown Group'),
+        missing = [chat_id for chat_id in chats if chat_id not in groups]
+        if missing:
+            new_groups = Group.create([{
+                'name': chats[chat_id].get('title', 'Unknown Group'),
                 'chat_id': chat_id,
-                'chat_type': chat_data.get('type'),
+                'chat_type': chats[chat_id].get('type'),
                 'config_id': self.id,
+            } for chat_id in missing])
+            for group in new_groups:
+                groups[group.chat_id] = group
+                _logger.info(f"Created new Telegram group: {group.name} (ID: {group.chat_id})")
+            ingest_cache.update_after_commit(self.env.cr, ingest_cache.GROUP_CACHE, {
+                (dbname, self.id, group.chat_id): group.id for group in new_groups
             })
-            _logger.info(f"Created new Telegram group: {group.name} (ID: {chat_id})")
         
-        return group
+        return groups
     
-    def _find_or_create_member(self, from_data, group):
-        """Find or create a Telegram member"""
-        if not from_data:
-            return None
-        
-        telegram_id = str(from_data.get('id'))
-        member = self.env['telegram.member'].search([
-            ('telegram_id', '=', telegram_id),
-            ('group_id', '=', group.id)
-        ], limit=1)
+    def _find_or_create_members(self, senders):
+        """Find or create the members for a list of ``(from_data, group)`` pairs
+
+        Returns a dict mapping ``(telegram_id, group_id)`` to the member record.
+        Known members are resolved from the process-level ``MEMBER_CACHE``;
+        the senders' profiles are brought up to date on ``telegram.user``.
+        """
+        Member = self.env['telegram.member']
+        dbname = self.env.cr.dbname
+        ingest_cache.check_signals(self.env.cr, self.env.registry)
+        
+        pairs = {}
+        for from_data, group in senders:
+            pairs.setdefault((str(from_data.get('id')), group.id), (from_data, group))
+        if not pairs:
+            return {}
+        users = self.env['telegram.user']._sync_profiles([from_data for from_data, _group in pairs.values()])
+        
+        members = {}
+        for telegram_id, group_id in pairs:
+            member_id = ingest_cache.MEMBER_CACHE.get((dbname, group_id, telegram_id))
+            if member_id:
+                members[(telegram_id, group_id)] = Member.browse(member_id)
+        
+        uncached = [key for key in pairs if key not in members]
+        if uncached:
+            # A single query on both columns; pairs that merely share one of
+            # the two values are filtered out below
+            found = {}
+            for member in Member.search([
+                ('telegram_id', 'in', list({telegram_id for telegram_id, _group_id in uncached})),
+                ('group_id', 'in', list({group_id for _telegram_id, group_id in uncached}))
+            ]):
+                key = (member.telegram_id, member.group_id.id)
+                if key in pairs:
+                    found[key] = member
+            members.update(found)
+            ingest_cache.update_after_commit(self.env.cr, ingest_cache.MEMBER_CACHE, {
+                (dbname, group_id, telegram_id): member.id
+                for (telegram_id, group_id), member in found.items()
+            })
         
-        if not member:
-            username = from_data.get('username', '')
-            first_name = from_data.get('first_name', '')
-            last_name = from_data.get('last_name', '')
-            
-            display_name = ' '.join(filter(None, [first_name, last_name])) or username or 'Unknown'
-            
-            member = self.env['telegram.member'].create({
-                'name': display_name,
-                'telegram_id': telegram_id,
-                'username': username,
-                'group_id': group.id,
-                'is_bot': from_data.get('is_bot', False),
+        missing = [key for key in pairs if key not in members]
+        if missing:
+            new_members = Member.create([
+                {'user_id': users[telegram_id].id, 'group_id': group_id}
+                for telegram_id, group_id in missing
+            ])
+            for member in new_members:
+                members[(member.telegram_id, member.group_id.id)] = member
+                _logger.debug(f"Created new member: {member.name} (ID: {member.telegram_id}) in group {member.group_id.name}")
+            ingest_cache.update_after_commit(self.env.cr, ingest_cache.MEMBER_CACHE, {
+                (dbname, member.group_id.id, member.telegram_id): member.id for member in new_members
             })
-            _logger.info(f"Created new member: {member.name} (ID: {telegram_id}) in group {group.name}")
         
-        return member
+        return members
     
-    def _store_message(self, message_data, group, member):
-        """Store a message in the database"""
-        message_id = str(message_data.get('message_id'))
-        
-        # Check if message already exists
-        existing = self.env['telegram.message'].search([
-            ('message_id', '=', message_id),
-            ('group_id', '=', group.id)
-        ], limit=1)
-        
-        if existing:
-            _logger.debug(f"Message {message_id} already exists, skipping")
-            return existing
-        
+    def _prepare_message_values(self, message_data, group, member):
+        """Build the ``telegram.message`` values for a Telegram message"""
         # Extract message content
         text = message_data.get('text') or message_data.get('caption', '')
+        reply_to = message_data.get('reply_to_message') or {}
         
-        # Create message record
-        message = self.env['telegram.message'].create({
-            'message_id': message_id,
+        return {
+            'message_id': str(message_data.get('message_id')),
             'group_id': group.id,
             'member_id': member.id if member else False,
             'message_text': text,
             'message_date': datetime.fromtimestamp(message_data.get('date', 0)),
-            'is_reply': bool(message_data.get('reply_to_message')),
-        })
-        
-        _logger.info(f"✅ Stored message {message_id} from {member.name if member else 'Unknown'} in {group.name}")
-        return message
+            'is_reply': bool(reply_to),
+            'reply_to_message_id': str(reply_to['message_id']) if reply_to.get('message_id') else False,
+        }
     
     def action_sync_team_members(self):
         """Manually sync team members from the team source group"""
@@ -890,42 +1422,137 @@ User clicked "I Made You Admin" but permissions not granted yet."""
         if not self.team_source_group_id:
             raise UserError(_('Please select a Team Source Group first'))
         
-        team_group = self.team_source_group_id
-        team_members = team_group.member_ids.filtered('is_active')
-        
-        # Get all unique telegram IDs from team group
-        team_telegram_ids = team_members.mapped('telegram_id')
-        
-        # Update existing team member records
-        synced_count = 0
-        for member in team_members:
-            existing = self.env['telegram.team.member'].search([
-                ('telegram_id', '=', member.telegram_id)
-            ])
-            if existing:
-                existing.write({'is_active': True})
-            else:
-                self.env['telegram.team.member'].create({
-                    'name': member.name,
-                    'telegram_id': member.telegram_id,
-                    'username': member.username,
-                })
-            synced_count += 1
+        diff = self._sync_team_members()
+        return self._team_diff_notification(_('Team Members Synced'), diff)
+    
+    def action_reconcile_team_members(self):
+        """Check the team source group against Telegram, then sync team members"""
+        self.ensure_one()
+        if not self.team_source_group_id:
+            raise UserError(_('Please select a Team Source Group first'))
         
-        # Deactivate team members no longer in the group
-        all_team_ids = self.env['telegram.team.member'].search([]).mapped('telegram_id')
-        removed_ids = list(set(all_team_ids) - set(team_telegram_ids))
-        if removed_ids:
-            self.env['telegram.team.member'].search([
-                ('telegram_id', 'in', removed_ids)
-            ]).write({'is_active': False})
+        try:
+            diff = self._reconcile_team_members()
+        except TelegramApiError as e:
+            raise UserError(_('Could not read the team group from Telegram: %s') % e.description)
+        return self._team_diff_notification(_('Team Members Reconciled'), diff)
+    
+    @api.model
+    def _cron_reconcile_team_members(self):
+        """Reconcile the team of every configuration with Telegram (called by scheduled action)"""
+        configs = self.search([('active', '=', True), ('team_source_group_id', '!=', False)])
+        for config in configs:
+            try:
+                diff = config._reconcile_team_members()
+            except TelegramApiError as e:
+                _logger.error(f"Could not reconcile team members of {config.name}: {str(e)}")
+                continue
+            if any(diff.values()):
+                _logger.info(f"Team members of {config.name} reconciled: {config._format_team_diff(diff)}")
+                config._send_monitoring_alert_team_changes(diff)
+    
+    def _sync_team_members(self):
+        """Make the team member registry match the active members of the team source group
+
+        Reads both sides once, then creates the missing team members in one
+        go and (de)activates the others with one write each. The
+        ``is_team_member`` flags follow through ``telegram.team.member``.
+
+        Returns the names of the team members ``added``, ``reactivated`` and
+        ``deactivated``.
+        """
+        self.ensure_one()
+        TeamMember = self.env['telegram.team.member']
+        
+        source = {
+            member['telegram_id']: member
+            for member in self.env['telegram.member'].search_read([
+                ('group_id', '=', self.team_source_group_id.id),
+                ('is_active', '=', True),
+                ('is_bot', '=', False),
+            ], ['telegram_id', 'name', 'username'])
+        }
+        team = TeamMember.search([])
+        registered = set(team.mapped('telegram_id'))
+        
+        to_activate = team.filtered(lambda t: t.telegram_id in source and not t.is_active)
+        to_deactivate = team.filtered(lambda t: t.telegram_id not in source and t.is_active)
+        added = TeamMember.create([
+            {'name': member['name'], 'telegram_id': telegram_id, 'username': member['username']}
+            for telegram_id, member in source.items() if telegram_id not in registered
+        ])
+        to_activate.write({'is_active': True})
+        to_deactivate.write({'is_active': False})
+        self._offboard_team_members(to_deactivate)
         
+        return {
+            'added': added.mapped('name'),
+            'reactivated': to_activate.mapped('name'),
+            'deactivated': to_deactivate.mapped('name'),
+        }
+    
+    def _reconcile_team_members(self):
+        """Bring the team source group in line with Telegram, then sync the registry
+
+        ``getChatAdministrators`` lists the group's admins, who are added to
+        or reactivated in the group. The Bot API cannot list plain members,
+        so every other member active locally is checked with
+        ``getChatMember`` (in parallel) and marked as left when Telegram says
+        so; members whose check failed are left as they are until next time.
+
+        Returns the diff of ``_sync_team_members`` plus the names of the
+        group members that ``joined`` or ``left``.
+        """
+        self.ensure_one()
+        group = self.team_source_group_id
+        client = self._get_api_client()
+        Member = self.env['telegram.member']
+        
+        admins = [
+            admin['user'] for admin in client.get_chat_administrators(group.chat_id)
+            if not admin['user'].get('is_bot')
+        ]
+        admin_members = Member.concat(*self._find_or_create_members([(user, group) for user in admins]).values())
+        joined = admin_members.filtered(lambda m: not m.is_active)
+        joined.write({'is_active': True, 'left_date': False})
+        
+        left = Member
+        others = Member.search([
+            ('group_id', '=', group.id),
+            ('is_active', '=', True),
+            ('is_bot', '=', False),
+            ('id', 'not in', admin_members.ids),
+        ])
+        statuses = self._get_chat_member_statuses([(group.chat_id, member.telegram_id) for member in others])
+        for member, status in zip(others, statuses):
+            if status in ('left', 'kicked'):
+                left |= member
+        unchecked = statuses.count(None)
+        if unchecked:
+            _logger.warning(f"Could not check {unchecked} of {len(others)} member(s) of {group.name}, "
+                            f"they will be checked on the next reconciliation")
+        left.write({'is_active': False, 'left_date': fields.Datetime.now()})
+        
+        diff = self._sync_team_members()
+        diff.update(joined=joined.mapped('name'), left=left.mapped('name'))
+        return diff
+    
+    @api.model
+    def _format_team_diff(self, diff):
+        labels = [('joined', 'joined the team group'), ('left', 'left the team group'),
+                  ('added', 'added'), ('reactivated', 'reactivated'), ('deactivated', 'deactivated')]
+        parts = [f"{len(diff[key])} {label} ({', '.join(diff[key])})"
+                 for key, label in labels if diff.get(key)]
+        return '; '.join(parts) or 'no changes'
+    
+    def _team_diff_notification(self, title, diff):
         return {
             'type': 'ir.actions.client',
             'tag': 'display_notification',
             'params': {
-                'title': _('Team Members Synced'),
-                'message': _('Successfully synced %d team members from %s') % (synced_count, team_group.name),
+                'title': title,
+                'message': _('%s: %s') % (self.team_source_group_id.name, self._format_team_diff(diff)),
                 'type': 'success',
+                'sticky': any(diff.values()),
             }
-        }
\ No newline at end of file
+        }
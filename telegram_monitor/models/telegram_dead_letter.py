@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+import traceback
+from datetime import timedelta
+
+from odoo import models, fields, api
+from odoo.tools.sql import create_index
+
+from ..tools import ingest_cache, metrics
+
+_logger = logging.getLogger(__name__)
+
+
+class TelegramDeadLetter(models.Model):
+    _name = 'telegram.dead.letter'
+    _description = 'Failed Telegram Update'
+    _order = 'id desc'
+
+    config_id = fields.Many2one('telegram.config', string='Bot Configuration', required=True, ondelete='cascade')
+    update_id = fields.Char('Update ID', readonly=True)
+    update_type = fields.Char('Update Type', readonly=True)
+    payload = fields.Text('Raw Update', readonly=True, help='The update as received from Telegram, as JSON')
+    error = fields.Text('Error', readonly=True)
+    error_traceback = fields.Text('Traceback', readonly=True)
+    state = fields.Selection([
+        ('failed', 'Failed'),
+        ('replayed', 'Replayed'),
+        ('discarded', 'Discarded'),
+    ], string='Status', default='failed', required=True)
+    attempts = fields.Integer('Replay Attempts', default=0, readonly=True)
+    replayed_at = fields.Datetime('Replayed At', readonly=True)
+
+    def init(self):
+        create_index(self._cr, 'telegram_dead_letter_failed_index', self._table,
+                     ['config_id', 'id'], where="state = 'failed'")
+
+    @api.model
+    def _record(self, config, update, error):
+        """Keep an update whose processing failed, with its raw JSON
+
+        Must be called after the savepoint of the update was rolled back.
+        """
+        # IDs read or created in the rolled back savepoint may be waiting to
+        # enter the ingestion cache, drop this database's entries instead
+        ingest_cache.invalidate_after_commit(self.env.cr)
+        return self.sudo().create({
+            'config_id': config.id,
+            'update_id': str(update.get('update_id') or ''),
+            'update_type': metrics.update_type(update),
+            'payload': json.dumps(update, ensure_ascii=False),
+            'error': str(error),
+            'error_traceback': ''.join(traceback.format_exception(error)),
+        })
+
+    def action_replay(self):
+        """Process the selected failed updates again, each in its own savepoint"""
+        letters = self.filtered(lambda letter: letter.state == 'failed').sorted('id')
+        replayed = 0
+        for letter in letters:
+            config = letter.config_id.sudo().with_context(telegram_replay=True)
+            try:
+                with self.env.cr.savepoint():
+                    config._replay_update(json.loads(letter.payload))
+            except Exception as e:
+                ingest_cache.invalidate_after_commit(self.env.cr)
+                letter.write({
+                    'attempts': letter.attempts + 1,
+                    'error': str(e),
+                    'error_traceback': ''.join(traceback.format_exception(e)),
+                })
+                continue
+            letter.write({
+                'state': 'replayed',
+                'attempts': letter.attempts + 1,
+                'replayed_at': fields.Datetime.now(),
+            })
+            replayed += 1
+        _logger.info(f"Replayed {replayed} of {len(letters)} failed Telegram update(s)")
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': 'Replay',
+                'message': f'{replayed} of {len(letters)} update(s) replayed successfully.',
+                'type': 'success' if replayed == len(letters) else 'warning',
+                'next': {'type': 'ir.actions.client', 'tag': 'soft_reload'},
+            }
+        }
+
+    def action_discard(self):
+        self.filtered(lambda letter: letter.state == 'failed').write({'state': 'discarded'})
+
+    @api.autovacuum
+    def _gc_dead_letters(self):
+        """Delete replayed and discarded updates after a month"""
+        self.search([
+            ('state', 'in', ('replayed', 'discarded')),
+            ('write_date', '<', fields.Datetime.now() - timedelta(days=30)),
+        ]).unlink()
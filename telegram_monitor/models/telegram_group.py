@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 from odoo import models, fields, api
 from odoo.exceptions import UserError
+from odoo.tools.sql import create_index
+
+from ..tools import ingest_cache
 
 class TelegramGroup(models.Model):
     _name = 'telegram.group'
@@ -8,9 +11,9 @@ class TelegramGroup(models.Model):
     _order = 'name'
 
     name = fields.Char('Group Name', required=True)
-    chat_id = fields.Char('Chat ID', required=True, index=True)
+    chat_id = fields.Char('Chat ID', required=True)
     chat_type = fields.Char('Chat Type', help='Type of chat: group or supergroup')
-    config_id = fields.Many2one('telegram.config', string='Configuration', required=True, ondelete='cascade')
+    config_id = fields.Many2one('telegram.config', string='Configuration', required=True, ondelete='cascade', index=True)
     group_type = fields.Selection([
         ('internal', 'Internal Team Chat'),
         ('client', 'Client Support Group'),
@@ -44,24 +47,49 @@ class TelegramGroup(models.Model):
     description = fields.Text('Description')
     member_ids = fields.One2many('telegram.member', 'group_id', string='Members')
     message_ids = fields.One2many('telegram.message', 'group_id', string='Messages')
-    member_count = fields.Integer('Member Count', compute='_compute_member_count', store=True)
-    message_count = fields.Integer('Message Count', compute='_compute_message_count', store=True)
-    team_member_count = fields.Integer('Team Members', compute='_compute_team_member_count', store=True)
+    member_count = fields.Integer('Member Count', compute='_compute_member_counts', store=True)
+    message_count = fields.Integer('Message Count', default=0, readonly=True,
+                                   help='Maintained incrementally when messages are stored or deleted')
+    team_member_count = fields.Integer('Team Members', compute='_compute_member_counts', store=True)
     
-    @api.depends('member_ids')
-    def _compute_member_count(self):
+    @api.depends('member_ids.is_active', 'member_ids.is_team_member')
+    def _compute_member_counts(self):
+        """Count active (team) members with grouped COUNT queries"""
+        groups = self.filtered('id')
+        domain = [('group_id', 'in', groups.ids), ('is_active', '=', True)]
+        Member = self.env['telegram.member']
+        member_counts = dict(Member._read_group(domain, ['group_id'], ['__count']))
+        team_counts = dict(Member._read_group(domain + [('is_team_member', '=', True)], ['group_id'], ['__count']))
         for group in self:
-            group.member_count = len(group.member_ids.filtered('is_active'))
+            group.member_count = member_counts.get(group._origin, 0)
+            group.team_member_count = team_counts.get(group._origin, 0)
     
-    @api.depends('message_ids')
-    def _compute_message_count(self):
-        for group in self:
-            group.message_count = len(group.message_ids)
+    @api.model
+    def _add_message_counts(self, deltas):
+        """Add ``{group_id: delta}`` to message_count with a single UPDATE"""
+        deltas = {group_id: delta for group_id, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        self.env.cr.execute("""
+            UPDATE telegram_group g
+               SET message_count = g.message_count + v.delta
+              FROM unnest(%s::int[], %s::int[]) AS v(id, delta)
+             WHERE g.id = v.id
+        """, (list(deltas), list(deltas.values())))
+        self.invalidate_model(['message_count'])
     
-    @api.depends('member_ids', 'member_ids.is_team_member')
-    def _compute_team_member_count(self):
-        for group in self:
-            group.team_member_count = len(group.member_ids.filtered(lambda m: m.is_team_member and m.is_active))
+    def _recount_messages(self):
+        """Reset message_count from the stored messages, archived ones included"""
+        if not self:
+            return
+        self.env['telegram.message'].flush_model(['group_id'])
+        self.env.cr.execute("""
+            UPDATE telegram_group g
+               SET message_count = (SELECT count(*) FROM telegram_message m WHERE m.group_id = g.id)
+                                 + (SELECT count(*) FROM telegram_message_archive a WHERE a.group_id = g.id)
+             WHERE g.id IN %s
+        """, (tuple(self.ids),))
+        self.invalidate_recordset(['message_count'])
     
     def action_copy_invite_link(self):
         """Copy invite link to clipboard"""
@@ -125,4 +153,30 @@ class TelegramGroup(models.Model):
     
     _sql_constraints = [
         ('chat_id_config_unique', 'unique(chat_id, config_id)', 'This Telegram group is already registered for this configuration!')
-    ]
\ No newline at end of file
+    ]
+    
+    def write(self, vals):
+        if {'chat_id', 'config_id'} & set(vals):
+            self._forget_cached_ids()
+        return super().write(vals)
+    
+    def unlink(self):
+        self._forget_cached_ids()
+        return super().unlink()
+    
+    def _forget_cached_ids(self):
+        """Drop these groups and their members from the ingestion caches, here and in other workers"""
+        dbname = self.env.cr.dbname
+        group_ids = set(self.ids)
+        ingest_cache.GROUP_CACHE.pop_where(
+            lambda key, group_id: key[0] == dbname and group_id in group_ids)
+        ingest_cache.MEMBER_CACHE.pop_where(
+            lambda key, _member_id: key[0] == dbname and key[1] in group_ids)
+        ingest_cache.signal_after_commit(self.env.cr, self.env.registry)
+    
+    def init(self):
+        ingest_cache.create_signal_sequence(self._cr)
+        # The (chat_id, config_id) unique constraint already serves chat lookups;
+        # this one keeps the setup watchdog off the full table
+        create_index(self._cr, 'telegram_group_setup_pending_index', self._table,
+                     ['setup_started_at'], where="setup_status IN ('pending', 'delayed')")
\ No newline at end of file
@@ -1,39 +1,127 @@
 # -*- coding: utf-8 -*-
-from odoo import models, fields, api
+from odoo import models, fields, api, _
+from odoo.tools.sql import create_index
+
+from ..tools import ingest_cache
 
 class TelegramMember(models.Model):
     _name = 'telegram.member'
     _description = 'Telegram Group Member'
-    _order = 'name'
+    _order = 'user_id, id'
 
-    name = fields.Char('Name', required=True)
-    telegram_id = fields.Char('Telegram User ID', required=True, index=True)
-    username = fields.Char('Username')
+    # Profile data lives once per Telegram user on telegram.user; telegram_id
+    # is kept here as the immutable key of the ingestion lookups and indexes
+    user_id = fields.Many2one('telegram.user', string='Telegram User', required=True, ondelete='cascade', index=True)
+    name = fields.Char(related='user_id.name', readonly=False)
+    telegram_id = fields.Char(related='user_id.telegram_id', store=True)
+    username = fields.Char(related='user_id.username', readonly=False)
     group_id = fields.Many2one('telegram.group', string='Group', required=True, ondelete='cascade', index=True)
-    is_bot = fields.Boolean('Is Bot', default=False)
-    is_team_member = fields.Boolean('Is Team Member', compute='_compute_is_team_member', store=False)
+    is_bot = fields.Boolean(related='user_id.is_bot')
+    is_team_member = fields.Boolean('Is Team Member', compute='_compute_is_team_member', store=True, index=True)
     join_date = fields.Datetime('Joined Date', default=fields.Datetime.now)
     left_date = fields.Datetime('Left Date')
     is_active = fields.Boolean('Active in Group', default=True)
-    phone = fields.Char('Phone Number')
-    email = fields.Char('Email')
+    phone = fields.Char(related='user_id.phone', readonly=False)
+    email = fields.Char(related='user_id.email', readonly=False)
     notes = fields.Text('Notes')
     
+    @api.depends('telegram_id')
     def _compute_is_team_member(self):
         """Check if this member is registered as a Nerosoft team member globally"""
-        # Get all active team member telegram IDs
-        team_telegram_ids = self.env['telegram.team.member'].search([
+        # Get the active team member telegram IDs among these members only
+        team_telegram_ids = set(self.env['telegram.team.member'].search([
+            ('telegram_id', 'in', list(set(self.mapped('telegram_id')))),
             ('is_active', '=', True)
-        ]).mapped('telegram_id')
+        ]).mapped('telegram_id'))
         
         # Check each member
         for member in self:
             member.is_team_member = member.telegram_id in team_telegram_ids
     
+    @api.model
+    def _recompute_team_membership(self, telegram_ids):
+        """Recompute is_team_member after the team registry changed
+
+        Only the members with the given Telegram IDs are recomputed; the
+        stored is_from_team flag of their messages follows through the
+        field dependencies.
+        """
+        if not telegram_ids:
+            return
+        members = self.search([('telegram_id', 'in', list(telegram_ids))])
+        members.modified(['telegram_id'])
+    
+    @api.model
+    def _get_active_memberships(self, telegram_ids, domain=None):
+        """Return the active memberships of the given Telegram users
+
+        Served by the partial ``telegram_id`` index on active members, so the
+        cost follows the number of users, not the number of groups.
+        """
+        if not telegram_ids:
+            return self.browse()
+        return self.search([
+            ('telegram_id', 'in', list(telegram_ids)),
+            ('is_active', '=', True),
+        ] + (domain or []), order='telegram_id, group_id')
+    
+    def action_remove_from_group(self):
+        """Queue the removal of these members from their Telegram groups"""
+        members = self._queue_removal()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Removal Queued'),
+                'message': _('%s member(s) will be removed from their groups') % len(members),
+                'type': 'success',
+                'sticky': False,
+            }
+        }
+    
+    def _queue_removal(self):
+        """Queue one "Remove Member" item per active member; returns the members queued"""
+        members = self.filtered(lambda m: m.is_active and not m.is_bot)
+        self.env['telegram.outbound.message']._enqueue_batch([{
+            'config_id': member.group_id.config_id.id,
+            'chat_id': member.group_id.chat_id,
+            'method': 'kick_member',
+            'target_user_id': member.telegram_id,
+        } for member in members])
+        return members
+    
     _sql_constraints = [
         ('telegram_id_group_unique', 'unique(telegram_id, group_id)', 'This user is already in this group!')
     ]
     
+    def write(self, vals):
+        if {'telegram_id', 'group_id'} & set(vals):
+            self._forget_cached_ids()
+        return super().write(vals)
+    
+    def unlink(self):
+        self._forget_cached_ids()
+        # Their messages are deleted by the database (ondelete cascade),
+        # behind the message_count maintained by telegram.message.unlink
+        groups = self.group_id
+        res = super().unlink()
+        groups.exists()._recount_messages()
+        return res
+    
+    def _forget_cached_ids(self):
+        """Drop these members from the ingestion cache, here and in other workers"""
+        dbname = self.env.cr.dbname
+        member_ids = set(self.ids)
+        ingest_cache.MEMBER_CACHE.pop_where(
+            lambda key, member_id: key[0] == dbname and member_id in member_ids)
+        ingest_cache.signal_after_commit(self.env.cr, self.env.registry)
+    
+    def init(self):
+        # The (telegram_id, group_id) unique constraint serves member lookups;
+        # this one finds the groups a user is still active in
+        create_index(self._cr, 'telegram_member_active_telegram_id_index', self._table,
+                     ['telegram_id'], where='is_active')
+    
     def name_get(self):
         result = []
         for member in self:
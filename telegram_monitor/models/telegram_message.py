@@ -1,20 +1,52 @@
 # -*- coding: utf-8 -*-
+import logging
+from collections import Counter
+
+import psycopg2
+from markupsafe import Markup, escape
+
 from odoo import models, fields, api
+from odoo.tools import SQL, escape_psql
+from odoo.tools.sql import create_index
+
+_logger = logging.getLogger(__name__)
+
+# Text search configuration of the full-text index. 'simple' does not stem,
+# so it works the same for every language clients write in.
+FTS_CONFIG = 'simple'
+# Indexed expression; queries must use the very same one to hit the index
+FTS_DOCUMENT = f"to_tsvector('{FTS_CONFIG}'::regconfig, coalesce(message_text, ''))"
+# ts_headline does not escape the text: matches are marked with these, then
+# turned into <mark> once the text is escaped
+HEADLINE_START, HEADLINE_STOP = '\u27e6', '\u27e7'
 
 class TelegramMessage(models.Model):
     _name = 'telegram.message'
     _description = 'Telegram Message'
     _order = 'message_date desc'
 
-    message_id = fields.Char('Message ID', required=True, index=True)
-    group_id = fields.Many2one('telegram.group', string='Group', required=True, ondelete='cascade', index=True)
+    message_id = fields.Char('Message ID', required=True)
+    group_id = fields.Many2one('telegram.group', string='Group', required=True, ondelete='cascade')
     member_id = fields.Many2one('telegram.member', string='From', required=True, ondelete='cascade')
-    message_text = fields.Text('Message')
+    message_text = fields.Text('Message', index='trigram')
     message_date = fields.Datetime('Date', required=True, index=True)
     is_from_team = fields.Boolean('From Team', compute='_compute_is_from_team', store=True)
     is_reply = fields.Boolean('Is Reply', default=False)
     reply_to_message_id = fields.Char('Reply To Message ID')
     
+    @api.model_create_multi
+    def create(self, vals_list):
+        messages = super().create(vals_list)
+        self.env['telegram.group']._add_message_counts(Counter(message.group_id.id for message in messages))
+        self.env['telegram.response.time'].sudo()._process_messages(messages)
+        return messages
+    
+    def unlink(self):
+        deltas = Counter(message.group_id.id for message in self)
+        res = super().unlink()
+        self.env['telegram.group']._add_message_counts({group_id: -count for group_id, count in deltas.items()})
+        return res
+    
     @api.depends('member_id', 'member_id.is_team_member')
     def _compute_is_from_team(self):
         """Determine if message is from a team member"""
@@ -23,4 +55,102 @@ class TelegramMessage(models.Model):
     
     _sql_constraints = [
         ('message_id_group_unique', 'unique(message_id, group_id)', 'This message already exists!')
-    ]
\ No newline at end of file
+    ]
+    
+    def init(self):
+        # Per-group message lists are read newest first; the (message_id, group_id)
+        # unique constraint serves the duplicate check
+        create_index(self._cr, 'telegram_message_group_date_index', self._table,
+                     ['group_id', 'message_date DESC'])
+        # Messages of given members: is_from_team recomputes, the cascade from
+        # telegram.member and the member filter of _search_text
+        create_index(self._cr, 'telegram_message_member_date_index', self._table,
+                     ['member_id', 'message_date DESC'])
+        # Full-text search (see _search_text); substring searches use the
+        # trigram index of message_text
+        create_index(self._cr, 'telegram_message_text_fts_index', self._table,
+                     [FTS_DOCUMENT], method='gin')
+        # Odoo silently skips the trigram index of message_text without
+        # pg_trgm; the field indexes are checked after init(), so enabling the
+        # extension here is enough for the index to be created right away
+        if not self.env.registry.has_trigram:
+            try:
+                with self._cr.savepoint(flush=False):
+                    self._cr.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+                self.env.registry.has_trigram = True
+            except psycopg2.Error as e:
+                _logger.warning(f"pg_trgm could not be installed, substring searches of Telegram "
+                                f"messages will scan the whole table: {e}")
+    
+    @api.model
+    def _search_text(self, query, mode='words', group_ids=None, member_ids=None, side=None,
+                     date_from=None, date_to=None, limit=50, offset=0):
+        """Ranked search over message texts
+
+        ``mode`` is ``words`` for a full-text search (web search syntax:
+        "quoted phrases", or, -excluded) or ``substring`` for a plain
+        substring match. ``side`` restricts to ``team`` or ``client``
+        messages. Hits are ranked by relevance, then newest first.
+
+        Returns ``(hits, has_more)`` where every hit is a dict with the
+        message ``id``, its ``rank`` and a ``headline``: an HTML excerpt
+        with the matches highlighted.
+        """
+        self.check_access('read')
+        if not (query or '').strip():
+            return [], False
+        
+        conditions = []
+        if mode == 'substring':
+            conditions.append(SQL("message_text ILIKE %s", f'%{escape_psql(query)}%'))
+            rank = SQL("0.0")
+            tsquery = SQL("plainto_tsquery(%s::regconfig, %s)", FTS_CONFIG, query)
+        else:
+            tsquery = SQL("websearch_to_tsquery(%s::regconfig, %s)", FTS_CONFIG, query)
+            conditions.append(SQL(f"{FTS_DOCUMENT} @@ %s", tsquery))
+            rank = SQL(f"ts_rank_cd({FTS_DOCUMENT}, %s)", tsquery)
+        if group_ids:
+            conditions.append(SQL("group_id IN %s", tuple(group_ids)))
+        if member_ids:
+            conditions.append(SQL("member_id IN %s", tuple(member_ids)))
+        if side == 'team':
+            conditions.append(SQL("is_from_team"))
+        elif side == 'client':
+            conditions.append(SQL("NOT coalesce(is_from_team, false)"))
+        if date_from:
+            conditions.append(SQL("message_date >= %s", date_from))
+        if date_to:
+            conditions.append(SQL("message_date < %s", date_to))
+        
+        self.flush_model(['message_text', 'group_id', 'member_id', 'is_from_team', 'message_date'])
+        # One extra row tells whether there is a next page, so matches are
+        # never counted
+        rows = self.env.execute_query(SQL("""
+            SELECT id, %(rank)s AS rank
+              FROM telegram_message
+             WHERE %(where)s
+          ORDER BY rank DESC, message_date DESC, id DESC
+             LIMIT %(limit)s OFFSET %(offset)s
+        """, rank=rank, where=SQL(" AND ").join(conditions), limit=limit + 1, offset=offset))
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if not rows:
+            return [], False
+        
+        # Headlines are costly, only build them for the page shown
+        headlines = dict(self.env.execute_query(SQL("""
+            SELECT id, ts_headline(%(config)s::regconfig, coalesce(message_text, ''), %(tsquery)s, %(options)s)
+              FROM telegram_message
+             WHERE id IN %(ids)s
+        """, config=FTS_CONFIG, tsquery=tsquery, ids=tuple(row[0] for row in rows),
+            options=f'StartSel={HEADLINE_START}, StopSel={HEADLINE_STOP}, MaxFragments=2, MaxWords=30, MinWords=10')))
+        return [
+            {'id': message_id, 'rank': rank, 'headline': self._format_headline(headlines.get(message_id) or '')}
+            for message_id, rank in rows
+        ], has_more
+    
+    @api.model
+    def _format_headline(self, headline):
+        return Markup(str(escape(headline))
+                      .replace(HEADLINE_START, '<mark>')
+                      .replace(HEADLINE_STOP, '</mark>'))
\ No newline at end of file
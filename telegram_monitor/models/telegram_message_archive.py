@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+import logging
+from datetime import timedelta
+
+from odoo import models, fields, api
+from odoo.tools.sql import create_index
+
+_logger = logging.getLogger(__name__)
+
+# Messages moved per statement, so a large first run does not hold long locks
+ARCHIVE_BATCH_SIZE = 50000
+
+
+class TelegramMessageArchive(models.Model):
+    _name = 'telegram.message.archive'
+    _description = 'Archived Telegram Message'
+    _order = 'message_date desc'
+
+    message_id = fields.Char('Message ID', required=True, readonly=True)
+    group_id = fields.Many2one('telegram.group', string='Group', required=True, ondelete='cascade', readonly=True)
+    member_id = fields.Many2one('telegram.member', string='From', ondelete='set null', readonly=True,
+                                index='btree_not_null')
+    message_text = fields.Text('Message', readonly=True)
+    message_date = fields.Datetime('Date', required=True, readonly=True)
+    is_from_team = fields.Boolean('From Team', readonly=True)
+    is_reply = fields.Boolean('Is Reply', readonly=True)
+    reply_to_message_id = fields.Char('Reply To Message ID', readonly=True)
+    archived_at = fields.Datetime('Archived At', readonly=True)
+
+    def init(self):
+        create_index(self._cr, 'telegram_message_archive_group_date_index', self._table,
+                     ['group_id', 'message_date DESC'])
+        # Duplicate check of replayed messages (see _get_archived_keys)
+        create_index(self._cr, 'telegram_message_archive_message_group_index', self._table,
+                     ['message_id', 'group_id'])
+
+    @api.model
+    def _get_archived_keys(self, message_ids, group_ids):
+        """Return the ``(message_id, group_id)`` pairs among these that are archived"""
+        if not message_ids or not group_ids:
+            return set()
+        self.env.cr.execute("""
+            SELECT message_id, group_id FROM telegram_message_archive
+             WHERE message_id = ANY(%s) AND group_id = ANY(%s)
+        """, [list(message_ids), list(group_ids)])
+        return set(self.env.cr.fetchall())
+
+    @api.model
+    def _cron_archive_messages(self):
+        """Move messages older than each configuration's retention window (called by scheduled action)"""
+        configs = self.env['telegram.config'].search([('message_retention_days', '>', 0)])
+        for config in configs:
+            cutoff = fields.Datetime.now() - timedelta(days=config.message_retention_days)
+            moved = self._archive_messages(config, cutoff, auto_commit=True)
+            if moved:
+                _logger.info(f"Archived {moved} message(s) older than {cutoff} for configuration {config.name}")
+
+    @api.model
+    def _archive_messages(self, config, cutoff, auto_commit=False):
+        """Move the messages of a configuration dated before ``cutoff`` to the archive
+
+        Rows are moved with DELETE ... RETURNING feeding an INSERT, in
+        batches. Response times and daily SLA statistics are kept: their
+        links to the archived messages are cleared, their figures are not.
+        Group message counters include archived messages and are unchanged.
+        """
+        self.env['telegram.message'].flush_model()
+        total = 0
+        while True:
+            self.env.cr.execute("""
+                WITH moved AS (
+                    DELETE FROM telegram_message
+                     WHERE id IN (
+                        SELECT m.id
+                          FROM telegram_message m
+                          JOIN telegram_group g ON g.id = m.group_id
+                         WHERE g.config_id = %(config_id)s AND m.message_date < %(cutoff)s
+                         LIMIT %(limit)s
+                     )
+                 RETURNING message_id, group_id, member_id, message_text, message_date,
+                           is_from_team, is_reply, reply_to_message_id
+                )
+                INSERT INTO telegram_message_archive (
+                    message_id, group_id, member_id, message_text, message_date,
+                    is_from_team, is_reply, reply_to_message_id, archived_at,
+                    create_uid, create_date, write_uid, write_date
+                )
+                SELECT message_id, group_id, member_id, message_text, message_date,
+                       is_from_team, is_reply, reply_to_message_id, now() AT TIME ZONE 'UTC',
+                       %(uid)s, now() AT TIME ZONE 'UTC', %(uid)s, now() AT TIME ZONE 'UTC'
+                  FROM moved
+            """, {'config_id': config.id, 'cutoff': cutoff, 'limit': ARCHIVE_BATCH_SIZE, 'uid': self.env.uid})
+            moved = self.env.cr.rowcount
+            total += moved
+            if auto_commit:
+                self.env.cr.commit()
+            if moved < ARCHIVE_BATCH_SIZE:
+                break
+        self.env['telegram.message'].invalidate_model()
+        self.env['telegram.response.time'].invalidate_model()
+        return total
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+import time
+from datetime import timedelta
+
+from odoo import models, fields, api
+from odoo.tools.sql import create_index
+
+from ..tools.rate_limit import get_bucket
+from ..tools.telegram_api import TelegramApiError
+
+_logger = logging.getLogger(__name__)
+
+# Telegram allows about 30 messages per second per bot and 20 per minute per group
+BOT_RATE, BOT_BURST = 25, 25
+CHAT_RATE, CHAT_BURST = 20 / 60, 3
+# Queued items handled per dispatcher run
+DISPATCH_BATCH_SIZE = 200
+# Longest pause taken to respect the per-bot limit before deferring instead
+MAX_BOT_WAIT = 2
+MAX_ATTEMPTS = 5
+# Telegram rejects longer messages
+MAX_MESSAGE_LENGTH = 4096
+DIGEST_SEPARATOR = '\n\n➖➖➖➖➖\n\n'
+
+
+class TelegramOutboundMessage(models.Model):
+    _name = 'telegram.outbound.message'
+    _description = 'Telegram Outbound Queue'
+    _order = 'id desc'
+
+    config_id = fields.Many2one('telegram.config', string='Bot Configuration', required=True, ondelete='cascade')
+    chat_id = fields.Char('Chat ID', required=True)
+    method = fields.Selection([
+        ('send_message', 'Send Message'),
+        ('leave_chat', 'Leave Chat'),
+        ('kick_member', 'Remove Member'),
+    ], string='Action', default='send_message', required=True)
+    kind = fields.Selection([
+        ('message', 'Message'),
+        ('alert', 'Monitoring Alert'),
+    ], string='Kind', default='message', required=True,
+        help='Monitoring alerts queued for the same chat are merged into a single digest message')
+    text = fields.Text('Text')
+    target_user_id = fields.Char('Target User ID', help='Telegram user removed from the chat by "Remove Member" items')
+    reply_markup = fields.Text('Reply Markup', help='Inline keyboard, as JSON')
+    state = fields.Selection([
+        ('queued', 'Queued'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ], string='Status', default='queued', required=True)
+    attempts = fields.Integer('Attempts', default=0)
+    next_attempt_at = fields.Datetime('Next Attempt', default=fields.Datetime.now)
+    sent_at = fields.Datetime('Sent At')
+    last_error = fields.Text('Last Error')
+
+    def init(self):
+        # The dispatcher only ever reads queued items: due ones, and those of one chat
+        create_index(self._cr, 'telegram_outbound_message_due_index', self._table,
+                     ['next_attempt_at', 'id'], where="state = 'queued'")
+        create_index(self._cr, 'telegram_outbound_message_chat_queued_index', self._table,
+                     ['config_id', 'chat_id'], where="state = 'queued'")
+
+    @api.model
+    def _enqueue(self, config, chat_id, method='send_message', text=None, reply_markup=None, kind='message'):
+        """Queue a Bot API action and wake up the dispatcher after commit"""
+        return self._enqueue_batch([{
+            'config_id': config.id,
+            'chat_id': str(chat_id),
+            'method': method,
+            'kind': kind,
+            'text': text,
+            'reply_markup': json.dumps(reply_markup) if reply_markup else False,
+        }])
+
+    @api.model
+    def _enqueue_batch(self, vals_list):
+        """Queue several Bot API actions at once and wake up the dispatcher once
+
+        Users only get read/write access to the queue; the actions that fill
+        it (team sync, offboarding, alerts) queue on their behalf.
+        """
+        records = self.sudo().create(vals_list)
+        if records:
+            self.env.ref('telegram_monitor.ir_cron_dispatch_telegram_outbound')._trigger()
+        return records
+
+    def action_retry(self):
+        """Queue failed items again"""
+        self.filtered(lambda m: m.state == 'failed').write({
+            'state': 'queued',
+            'attempts': 0,
+            'next_attempt_at': fields.Datetime.now(),
+        })
+        self.env.ref('telegram_monitor.ir_cron_dispatch_telegram_outbound')._trigger()
+
+    @api.model
+    def _cron_dispatch(self):
+        """Send due queue items (called by scheduled action)"""
+        self._dispatch(auto_commit=True)
+
+    @api.model
+    def _dispatch(self, auto_commit=False, limit=DISPATCH_BATCH_SIZE):
+        """Send due items in queue order, honoring Telegram's rate limits
+
+        Items of one chat are always sent in order: when an item has to
+        wait (rate limit, retry_after or backoff), every queued item of its
+        chat is postponed with it. Due monitoring alerts of a chat are sent
+        as one digest.
+        """
+        queue = self.search([
+            ('state', '=', 'queued'),
+            ('next_attempt_at', '<=', fields.Datetime.now()),
+        ], order='id', limit=limit)
+
+        handled = self.browse()
+        postponed = {}
+        for item in queue:
+            chat_key = (item.config_id.id, item.chat_id)
+            if item in handled or chat_key in postponed:
+                continue
+
+            batch = item
+            if item.kind == 'alert':
+                batch = (queue - handled).filtered(
+                    lambda m: m.kind == 'alert' and (m.config_id.id, m.chat_id) == chat_key
+                )
+                batch, text = batch._build_digest()
+            else:
+                text = item.text
+
+            wait = item._acquire_rate_limit()
+            if wait:
+                postponed[chat_key] = wait
+                continue
+
+            handled |= batch
+            try:
+                item._call_api(text)
+            except TelegramApiError as e:
+                wait = batch._handle_failure(e)
+                if wait:
+                    postponed[chat_key] = wait
+            else:
+                batch.write({'state': 'sent', 'sent_at': fields.Datetime.now(), 'last_error': False})
+            if auto_commit:
+                self.env.cr.commit()
+
+        for (config_id, chat_id), wait in postponed.items():
+            self._postpone_chat(config_id, chat_id, wait)
+        if postponed:
+            self.env.ref('telegram_monitor.ir_cron_dispatch_telegram_outbound')._trigger(
+                fields.Datetime.now() + timedelta(seconds=min(postponed.values()))
+            )
+        elif len(queue) == limit:
+            self.env.ref('telegram_monitor.ir_cron_dispatch_telegram_outbound')._trigger()
+
+    def _acquire_rate_limit(self):
+        """Take a token from the bot and chat buckets
+
+        Returns 0 when the item may be sent now, otherwise the number of
+        seconds it has to wait.
+        """
+        self.ensure_one()
+        wait = get_bucket(('chat', self.config_id.id, self.chat_id), CHAT_RATE, CHAT_BURST).try_acquire()
+        if wait:
+            return wait
+        bot_bucket = get_bucket(('bot', self.config_id.id), BOT_RATE, BOT_BURST)
+        wait = bot_bucket.try_acquire()
+        while wait and wait <= MAX_BOT_WAIT:
+            time.sleep(wait)
+            wait = bot_bucket.try_acquire()
+        return wait
+
+    def _call_api(self, text):
+        self.ensure_one()
+        client = self.config_id._get_api_client()
+        if self.method == 'leave_chat':
+            client.leave_chat(self.chat_id)
+            _logger.info(f"✅ Bot left group {self.chat_id}")
+        elif self.method == 'kick_member':
+            # Telegram has no "kick": ban, then lift the ban so the user may be invited again
+            client.ban_chat_member(self.chat_id, self.target_user_id)
+            client.unban_chat_member(self.chat_id, self.target_user_id)
+            _logger.info(f"✅ Removed user {self.target_user_id} from group {self.chat_id}")
+        else:
+            reply_markup = json.loads(self.reply_markup) if self.reply_markup else None
+            client.send_message(self.chat_id, text, reply_markup=reply_markup)
+
+    def _handle_failure(self, error):
+        """Record a failed attempt and return the seconds to wait before retrying, if any"""
+        attempts = max(self.mapped('attempts')) + 1
+        if error.retry_after:
+            # Rate limited: not the item's fault, retry once Telegram allows it
+            self.write({'last_error': str(error)})
+            _logger.warning(f"Telegram rate limit hit for chat {self.chat_id}, retrying in {error.retry_after}s")
+            return error.retry_after
+        if (error.error_code is None or error.error_code >= 500) and attempts < MAX_ATTEMPTS:
+            wait = 10 * 2 ** attempts
+            self.write({'attempts': attempts, 'last_error': str(error)})
+            _logger.warning(f"Telegram {self[:1].method} to {self[:1].chat_id} failed, retrying in {wait}s: {error}")
+            return wait
+        self.write({'state': 'failed', 'attempts': attempts, 'last_error': str(error)})
+        _logger.error(f"Telegram {self[:1].method} to {self[:1].chat_id} failed: {error}")
+        return 0
+
+    def _build_digest(self):
+        """Merge monitoring alerts into one message
+
+        Returns the alerts that fit in a single Telegram message and its text.
+        """
+        if len(self) == 1:
+            return self, self.text
+        header = f"📋 <b>MONITORING DIGEST</b> ({len(self)} alerts)" + DIGEST_SEPARATOR
+        included = self.browse()
+        texts = []
+        for alert in self:
+            candidate = header + DIGEST_SEPARATOR.join(texts + [alert.text or ''])
+            if texts and len(candidate) > MAX_MESSAGE_LENGTH:
+                break
+            included |= alert
+            texts.append(alert.text or '')
+        if len(included) == 1:
+            return included, included.text
+        header = f"📋 <b>MONITORING DIGEST</b> ({len(included)} alerts)" + DIGEST_SEPARATOR
+        return included, header + DIGEST_SEPARATOR.join(texts)
+
+    @api.model
+    def _postpone_chat(self, config_id, chat_id, seconds):
+        """Postpone every queued item of a chat so they keep their order"""
+        until = fields.Datetime.now() + timedelta(seconds=seconds)
+        self.search([
+            ('state', '=', 'queued'),
+            ('config_id', '=', config_id),
+            ('chat_id', '=', chat_id),
+            ('next_attempt_at', '<', until),
+        ]).write({'next_attempt_at': until})
+
+    @api.autovacuum
+    def _gc_sent_messages(self):
+        """Delete items sent more than a week ago"""
+        self.search([
+            ('state', '=', 'sent'),
+            ('sent_at', '<', fields.Datetime.now() - timedelta(days=7)),
+        ]).unlink()
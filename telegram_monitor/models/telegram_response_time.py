@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+import logging
+from collections import defaultdict
+
+from odoo import models, fields, api
+from odoo.tools.sql import create_index
+
+_logger = logging.getLogger(__name__)
+
+
+def _message_order(message):
+    """Chronological sort key; message IDs break ties within the same second"""
+    message_id = message.message_id or ''
+    return (message.message_date, int(message_id) if message_id.lstrip('-').isdigit() else 0)
+
+
+class TelegramResponseTime(models.Model):
+    _name = 'telegram.response.time'
+    _description = 'Telegram Response Time'
+    _order = 'client_date desc'
+
+    group_id = fields.Many2one('telegram.group', string='Group', required=True, ondelete='cascade')
+    client_message_id = fields.Many2one('telegram.message', string='Client Message', ondelete='set null', index=True)
+    client_member_id = fields.Many2one('telegram.member', string='Client', ondelete='set null',
+                                       index='btree_not_null')
+    client_date = fields.Datetime('Client Message Date', required=True, index=True)
+    response_message_id = fields.Many2one('telegram.message', string='Response', ondelete='set null',
+                                          index='btree_not_null')
+    responder_id = fields.Many2one('telegram.member', string='Responded By', ondelete='set null',
+                                   index='btree_not_null')
+    response_date = fields.Datetime('Response Date')
+    response_type = fields.Selection([
+        ('reply', 'Explicit Reply'),
+        ('next', 'Next Team Message'),
+    ], string='Response Type')
+    response_seconds = fields.Integer('Response Time (seconds)', aggregator='avg')
+    sla_breached = fields.Boolean('SLA Breached', default=False)
+    state = fields.Selection([
+        ('pending', 'Awaiting Response'),
+        ('responded', 'Responded'),
+    ], string='Status', default='pending', required=True)
+
+    def init(self):
+        # (group_id, client_date) serves the daily SLA refresh; the partial index
+        # keeps the lookup of client messages awaiting an answer small
+        create_index(self._cr, 'telegram_response_time_group_date_index', self._table,
+                     ['group_id', 'client_date'])
+        create_index(self._cr, 'telegram_response_time_pending_index', self._table,
+                     ['group_id', 'client_date'], where="state = 'pending'")
+
+    @api.model
+    def _process_messages(self, messages):
+        """Update response times for newly stored messages
+
+        Every client message of a monitored group opens a pending record.
+        A team message answers the pending records of its group that are
+        older than itself: when it is an explicit reply to a pending client
+        message, only that client's pending messages, otherwise all of them.
+        Only the pending records of the affected groups are read, so the
+        cost depends on the size of the page, not of the message history.
+
+        Telegram delivers updates in order, so records that are already
+        answered are never revisited; use ``_rebuild_for_groups`` after
+        importing older messages.
+        """
+        messages = messages.filtered(lambda m: m.group_id.is_monitored).sorted(_message_order)
+        if not messages:
+            return self.browse()
+
+        touched = self._register_messages(messages)
+        self.env['telegram.sla.daily']._refresh_for(touched)
+        return touched
+
+    def _register_messages(self, messages):
+        """Open and answer records for chronologically sorted messages, return the touched records"""
+        new_records = self.create([{
+            'group_id': message.group_id.id,
+            'client_message_id': message.id,
+            'client_member_id': message.member_id.id,
+            'client_date': message.message_date,
+        } for message in messages if self._is_client_message(message)])
+
+        team_messages = messages.filtered('is_from_team')
+        if not team_messages:
+            return new_records
+
+        pending = self.search([
+            ('state', '=', 'pending'),
+            ('group_id', 'in', team_messages.group_id.ids),
+            ('client_date', '<=', max(team_messages.mapped('message_date'))),
+        ])
+        answered = self.browse()
+        for team_message in team_messages:
+            group_pending = (pending - answered).filtered(
+                lambda r: r.group_id == team_message.group_id
+                and r._client_order() <= _message_order(team_message)
+            )
+            answered |= group_pending._answer_with(team_message)
+
+        return new_records | answered
+
+    def _client_order(self):
+        """Same sort key as ``_message_order``, for the client message of a record"""
+        message_id = self.client_message_id.message_id or ''
+        return (self.client_date, int(message_id) if message_id.lstrip('-').isdigit() else 0)
+
+    @api.model
+    def _is_client_message(self, message):
+        return not message.is_from_team and not message.member_id.is_bot
+
+    def _answer_with(self, team_message):
+        """Mark the records answered by a team message and return them"""
+        target = self.browse()
+        if team_message.reply_to_message_id:
+            target = self.filtered(
+                lambda r: r.client_message_id.message_id == team_message.reply_to_message_id
+            )
+        if target:
+            records = self.filtered(lambda r: r.client_member_id == target.client_member_id)
+        else:
+            records = self
+
+        sla_seconds = team_message.group_id.config_id.sla_response_minutes * 60
+        # Records of the same client message date get the same values: one write each
+        batches = defaultdict(lambda: self.browse())
+        for record in records:
+            response_seconds = max(0, int((team_message.message_date - record.client_date).total_seconds()))
+            batches['reply' if record in target else 'next', response_seconds] |= record
+        for (response_type, response_seconds), batch in batches.items():
+            batch.write({
+                'state': 'responded',
+                'response_message_id': team_message.id,
+                'responder_id': team_message.member_id.id,
+                'response_date': team_message.message_date,
+                'response_type': response_type,
+                'response_seconds': response_seconds,
+                'sla_breached': bool(sla_seconds) and response_seconds > sla_seconds,
+            })
+        return records
+
+    @api.model
+    def _rebuild_for_groups(self, groups, batch_size=5000):
+        """Recompute the response times of some groups from their stored messages
+
+        Only the period still covered by live messages is rebuilt: records
+        and daily statistics of archived messages (see
+        telegram.message.archive) are older than the first live message
+        and are kept as they are.
+
+        Messages are read in chronological batches (keyset pagination on
+        ``(message_date, id)``), whatever order they were stored in, so
+        messages imported or replayed late are paired with the right team
+        answers. Client messages still awaiting an answer at the end of a
+        batch stay pending in the database, where the next batches find
+        them.
+        """
+        Message = self.env['telegram.message']
+        for group in groups:
+            first = Message.search([('group_id', '=', group.id)], order='message_date, id', limit=1)
+            if not first:
+                _logger.info(f"No live messages in group {group.name}, response times kept")
+                continue
+            start = first.message_date
+            self.search([('group_id', '=', group.id), ('client_date', '>=', start)]).unlink()
+            after = None
+            while True:
+                domain = [('group_id', '=', group.id)]
+                if after:
+                    domain += ['|', ('message_date', '>', after[0]),
+                               '&', ('message_date', '=', after[0]), ('id', '>', after[1])]
+                messages = Message.search(domain, order='message_date, id', limit=batch_size)
+                if not messages:
+                    break
+                self._process_messages(messages)
+                after = (messages[-1].message_date, messages[-1].id)
+                self.env.flush_all()
+                self.env.invalidate_all()
+            # Also covers days whose rows the batches above did not touch
+            self.env['telegram.sla.daily']._refresh_range(group, fields.Date.to_date(start))
+            _logger.info(f"Rebuilt response times for group {group.name} since {start}")
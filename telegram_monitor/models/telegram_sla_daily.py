@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+import logging
+from datetime import timedelta
+
+from odoo import models, fields, api
+from odoo.tools.sql import create_index
+
+_logger = logging.getLogger(__name__)
+
+# Aggregates telegram.response.time per (group, responding team member, day).
+# Records still awaiting an answer are counted on the row without team member.
+_AGGREGATE_QUERY = """
+    INSERT INTO telegram_sla_daily (
+        group_id, team_member_id, day,
+        message_count, responded_count, breach_count,
+        response_p50, response_p90, response_max,
+        create_uid, create_date, write_uid, write_date
+    )
+    SELECT rt.group_id, tm.id, rt.client_date::date,
+           count(*), count(rt.response_date), count(*) FILTER (WHERE rt.sla_breached),
+           percentile_cont(0.5) WITHIN GROUP (ORDER BY rt.response_seconds),
+           percentile_cont(0.9) WITHIN GROUP (ORDER BY rt.response_seconds),
+           max(rt.response_seconds),
+           %(uid)s, now() AT TIME ZONE 'UTC', %(uid)s, now() AT TIME ZONE 'UTC'
+      FROM telegram_response_time rt
+ LEFT JOIN telegram_member m ON m.id = rt.responder_id
+ LEFT JOIN telegram_team_member tm ON tm.telegram_id = m.telegram_id
+     WHERE {where}
+  GROUP BY rt.group_id, tm.id, rt.client_date::date
+"""
+
+
+class TelegramSlaDaily(models.Model):
+    _name = 'telegram.sla.daily'
+    _description = 'Telegram SLA Daily Statistics'
+    _order = 'day desc, group_id'
+
+    group_id = fields.Many2one('telegram.group', string='Group', required=True, ondelete='cascade')
+    config_id = fields.Many2one(related='group_id.config_id', string='Configuration')
+    team_member_id = fields.Many2one('telegram.team.member', string='Team Member', ondelete='set null',
+                                     help='Team member who answered; empty for messages still awaiting a response')
+    day = fields.Date('Day', required=True, index=True)
+    message_count = fields.Integer('Client Messages')
+    responded_count = fields.Integer('Responded')
+    breach_count = fields.Integer('SLA Breaches')
+    response_p50 = fields.Float('Median Response (s)', aggregator='avg')
+    response_p90 = fields.Float('P90 Response (s)', aggregator='avg')
+    response_max = fields.Float('Max Response (s)', aggregator='max')
+
+    def init(self):
+        create_index(self._cr, 'telegram_sla_daily_group_day_index', self._table, ['group_id', 'day'])
+
+    @api.model
+    def _refresh_for(self, response_times):
+        """Recompute the rows of the groups and days touched by some response times"""
+        if not response_times:
+            return
+        days = {fields.Date.to_date(d) for d in response_times.mapped('client_date')}
+        self._refresh_range(response_times.group_id, min(days), max(days) + timedelta(days=1))
+
+    @api.model
+    def _refresh_range(self, groups, start, end=None):
+        """Recompute the rows of some groups from day ``start`` to ``end`` (excluded, open if None)"""
+        self.env['telegram.response.time'].flush_model()
+        params = {'uid': self.env.uid, 'groups': tuple(groups.ids), 'start': start, 'end': end}
+        self.env.cr.execute("""
+            DELETE FROM telegram_sla_daily
+             WHERE group_id IN %(groups)s AND day >= %(start)s
+               AND (%(end)s IS NULL OR day < %(end)s)
+        """, params)
+        self.env.cr.execute(
+            _AGGREGATE_QUERY.format(where="rt.group_id IN %(groups)s AND rt.client_date >= %(start)s"
+                                          " AND (%(end)s IS NULL OR rt.client_date < %(end)s)"),
+            params,
+        )
+        self.invalidate_model()
+
+    @api.model
+    def _rebuild(self):
+        """Recompute every row from telegram.response.time"""
+        self.env['telegram.response.time'].flush_model()
+        self.env.cr.execute("DELETE FROM telegram_sla_daily")
+        self.env.cr.execute(_AGGREGATE_QUERY.format(where="TRUE"), {'uid': self.env.uid})
+        self.invalidate_model()
+        _logger.info(f"Rebuilt SLA daily statistics: {self.env.cr.rowcount} row(s)")
+
+    def action_rebuild(self):
+        self.sudo()._rebuild()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'reload',
+        }
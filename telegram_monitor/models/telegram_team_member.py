@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
-from odoo import models, fields
+from odoo import models, fields, api
+from odoo.tools.sql import create_index
 
 class TelegramTeamMember(models.Model):
     _name = 'telegram.team.member'
@@ -7,16 +8,42 @@ class TelegramTeamMember(models.Model):
     _order = 'name'
 
     name = fields.Char('Name', required=True)
-    telegram_id = fields.Char('Telegram User ID', required=True, index=True)
+    telegram_id = fields.Char('Telegram User ID', required=True)
     username = fields.Char('Username')
     is_active = fields.Boolean('Active', default=True, help='Inactive members are no longer in the team source group')
     role = fields.Char('Role/Position')
     notes = fields.Text('Notes')
     
+    @api.model_create_multi
+    def create(self, vals_list):
+        team_members = super().create(vals_list)
+        self.env['telegram.member']._recompute_team_membership(set(team_members.mapped('telegram_id')))
+        return team_members
+    
+    def write(self, vals):
+        if not {'telegram_id', 'is_active'} & set(vals):
+            return super().write(vals)
+        telegram_ids = set(self.mapped('telegram_id'))
+        res = super().write(vals)
+        telegram_ids |= set(self.mapped('telegram_id'))
+        self.env['telegram.member']._recompute_team_membership(telegram_ids)
+        return res
+    
+    def unlink(self):
+        telegram_ids = set(self.mapped('telegram_id'))
+        res = super().unlink()
+        self.env['telegram.member']._recompute_team_membership(telegram_ids)
+        return res
+    
     _sql_constraints = [
         ('telegram_id_unique', 'unique(telegram_id)', 'This Telegram user is already registered as a team member!')
     ]
     
+    def init(self):
+        # Authorization checks and is_team_member only look for active team members
+        create_index(self._cr, 'telegram_team_member_active_telegram_id_index', self._table,
+                     ['telegram_id'], where='is_active')
+    
     def name_get(self):
         result = []
         for member in self:
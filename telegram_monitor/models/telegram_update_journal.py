@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+import base64
+import json
+import logging
+import zlib
+from datetime import timedelta
+
+from odoo import models, fields, api
+from odoo.tools.sql import create_index
+
+from ..tools import metrics
+
+_logger = logging.getLogger(__name__)
+
+# Update types re-run by default on replay: they only write to the database
+# (handlers skip their alerts under the ``telegram_replay`` context key).
+# Callback queries and bot status changes also send messages and leave groups.
+REPLAY_DEFAULT_TYPES = ('message', 'member_message', 'chat_member')
+# Journal pages read per query during a replay
+REPLAY_BATCH_SIZE = 100
+
+
+class TelegramUpdateJournal(models.Model):
+    _name = 'telegram.update.journal'
+    _description = 'Telegram Update Journal'
+    _order = 'id'
+    _log_access = False
+
+    config_id = fields.Many2one('telegram.config', string='Bot Configuration', required=True, ondelete='cascade', readonly=True)
+    received_at = fields.Datetime('Received At', required=True, default=fields.Datetime.now, readonly=True)
+    first_update_id = fields.Integer('First Update ID', readonly=True)
+    last_update_id = fields.Integer('Last Update ID', readonly=True)
+    update_count = fields.Integer('Updates', readonly=True)
+    payload = fields.Binary('Updates (zlib)', attachment=False, readonly=True,
+                            help='The page of updates as received from Telegram: JSON, zlib compressed')
+
+    def init(self):
+        create_index(self._cr, 'telegram_update_journal_config_received_index', self._table,
+                     ['config_id', 'received_at'])
+
+    @api.model
+    def _append(self, config, updates):
+        """Journal a page of raw updates, in the transaction that processes it"""
+        if not updates:
+            return self.browse()
+        update_ids = [update.get('update_id') or 0 for update in updates]
+        data = json.dumps(updates, ensure_ascii=False, separators=(',', ':')).encode()
+        return self.sudo().create({
+            'config_id': config.id,
+            'first_update_id': min(update_ids),
+            'last_update_id': max(update_ids),
+            'update_count': len(updates),
+            'payload': base64.b64encode(zlib.compress(data)),
+        })
+
+    def _get_updates(self):
+        """Return the raw updates of a journal page"""
+        self.ensure_one()
+        return json.loads(zlib.decompress(base64.b64decode(self.payload)))
+
+    @api.model
+    def _replay(self, config, since=None, until=None, types=REPLAY_DEFAULT_TYPES, auto_commit=False):
+        """Run the handlers again over the updates journaled in a time range
+
+        Pages are replayed in the order they were received and are not
+        journaled again; the polling offset is left alone. Messages already
+        stored are skipped by the usual deduplication, so replaying is a way
+        to backfill data derived from updates. Handlers run with the
+        ``telegram_replay`` context key, so past events do not alert again.
+
+        Returns the number of updates replayed.
+        """
+        config = config.with_context(telegram_replay=True)
+        domain = [('config_id', '=', config.id)]
+        if since:
+            domain.append(('received_at', '>=', since))
+        if until:
+            domain.append(('received_at', '<', until))
+        replayed, last_id = 0, 0
+        while True:
+            pages = self.search(domain + [('id', '>', last_id)], limit=REPLAY_BATCH_SIZE)
+            if not pages:
+                break
+            for page in pages:
+                updates = [update for update in page._get_updates()
+                           if metrics.update_type(update) in types]
+                if updates:
+                    config._process_updates(updates, journal=False, update_offset=False)
+                    replayed += len(updates)
+            last_id = pages[-1].id
+            if auto_commit:
+                self.env.cr.commit()
+            self.env.invalidate_all()
+        _logger.info(f"Replayed {replayed} journaled update(s) for configuration {config.name}")
+        return replayed
+
+    @api.autovacuum
+    def _gc_journal(self):
+        """Delete pages older than each configuration's journal retention"""
+        for config in self.env['telegram.config'].search([('journal_retention_days', '>', 0)]):
+            self.env.cr.execute("""
+                DELETE FROM telegram_update_journal
+                 WHERE config_id = %s AND received_at < %s
+            """, [config.id, fields.Datetime.now() - timedelta(days=config.journal_retention_days)])
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import models, fields, api
+
+from ..tools import ingest_cache
+
+_logger = logging.getLogger(__name__)
+
+# Profile fields taken from the ``from``/``user`` objects of Telegram updates
+PROFILE_FIELDS = ('name', 'username', 'is_bot')
+
+
+def profile_from_data(user_data):
+    """Return the profile values of a Telegram ``User`` object, in PROFILE_FIELDS order"""
+    username = user_data.get('username') or False
+    first_name = user_data.get('first_name', '')
+    last_name = user_data.get('last_name', '')
+    display_name = ' '.join(filter(None, [first_name, last_name])) or username or 'Unknown'
+    return (display_name, username, bool(user_data.get('is_bot')))
+
+
+class TelegramUser(models.Model):
+    _name = 'telegram.user'
+    _description = 'Telegram User'
+    _order = 'name'
+
+    name = fields.Char('Name', required=True)
+    telegram_id = fields.Char('Telegram User ID', required=True, readonly=True)
+    username = fields.Char('Username', index='btree_not_null')
+    is_bot = fields.Boolean('Is Bot', default=False)
+    phone = fields.Char('Phone Number')
+    email = fields.Char('Email')
+    member_ids = fields.One2many('telegram.member', 'user_id', string='Group Memberships')
+    group_count = fields.Integer('Active Groups', compute='_compute_group_count')
+
+    _sql_constraints = [
+        ('telegram_id_unique', 'unique(telegram_id)', 'This Telegram user already exists!')
+    ]
+
+    def _compute_group_count(self):
+        counts = dict(self.env['telegram.member']._read_group(
+            [('user_id', 'in', self.ids), ('is_active', '=', True)], ['user_id'], ['__count']))
+        for user in self:
+            user.group_count = counts.get(user._origin, 0)
+
+    def write(self, vals):
+        # A profile cached by another worker only saves a comparison, no
+        # need to signal it: a stale one is compared and written again
+        if set(PROFILE_FIELDS) & set(vals):
+            self._forget_cached_profiles()
+        return super().write(vals)
+
+    def unlink(self):
+        self._forget_cached_profiles()
+        # Their memberships go with them (ondelete cascade), and their
+        # messages with the memberships, so message_count is recounted
+        dbname = self.env.cr.dbname
+        telegram_ids = set(self.mapped('telegram_id'))
+        ingest_cache.MEMBER_CACHE.pop_where(
+            lambda key, _member_id: key[0] == dbname and key[2] in telegram_ids)
+        ingest_cache.signal_after_commit(self.env.cr, self.env.registry)
+        groups = self.member_ids.group_id
+        res = super().unlink()
+        groups.exists()._recount_messages()
+        return res
+
+    def _forget_cached_profiles(self):
+        """Drop these users from this process' ingestion cache"""
+        dbname = self.env.cr.dbname
+        user_ids = set(self.ids)
+        ingest_cache.USER_CACHE.pop_where(
+            lambda key, value: key[0] == dbname and value[0] in user_ids)
+
+    @api.model
+    def _sync_profiles(self, users_data):
+        """Find or create the users of a list of Telegram ``User`` objects
+
+        Profile changes are written once per user, and only when the name,
+        username or bot flag differ from what is stored. Users whose
+        profile is unchanged since the last commit are resolved from the
+        process-level ``USER_CACHE`` without any query.
+
+        Returns a dict mapping the Telegram ID (as a string) to the user record.
+        """
+        dbname = self.env.cr.dbname
+        ingest_cache.check_signals(self.env.cr, self.env.registry)
+
+        profiles = {}
+        for user_data in users_data:
+            profiles[str(user_data.get('id'))] = profile_from_data(user_data)
+        if not profiles:
+            return {}
+
+        users = {}
+        for telegram_id, profile in profiles.items():
+            cached = ingest_cache.USER_CACHE.get((dbname, telegram_id))
+            if cached and cached[1] == profile:
+                users[telegram_id] = self.browse(cached[0])
+
+        uncached = [telegram_id for telegram_id in profiles if telegram_id not in users]
+        if not uncached:
+            return users
+
+        changed = 0
+        for user in self.search([('telegram_id', 'in', uncached)]):
+            profile = profiles[user.telegram_id]
+            vals = {
+                field: value for field, value in zip(PROFILE_FIELDS, profile)
+                if (user[field] or False) != value
+            }
+            if vals:
+                user.write(vals)
+                changed += 1
+            users[user.telegram_id] = user
+
+        missing = [telegram_id for telegram_id in uncached if telegram_id not in users]
+        new_users = self.create([
+            dict(zip(PROFILE_FIELDS, profiles[telegram_id]), telegram_id=telegram_id)
+            for telegram_id in missing
+        ])
+        for user in new_users:
+            users[user.telegram_id] = user
+        if changed or new_users:
+            _logger.debug(f"Telegram users: {len(new_users)} created, {changed} profiles updated")
+
+        ingest_cache.update_after_commit(self.env.cr, ingest_cache.USER_CACHE, {
+            (dbname, telegram_id): (users[telegram_id].id, profiles[telegram_id])
+            for telegram_id in uncached
+        })
+        return users
+
+    def action_view_memberships(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': self.name,
+            'res_model': 'telegram.member',
+            'view_mode': 'list,form',
+            'domain': [('user_id', '=', self.id)],
+            'context': {'create': False},
+        }
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Replay recorded Telegram updates against the webhook endpoint
+
+Stands in for Telegram when testing webhook mode locally. The input file
+holds either a JSON list of updates, a getUpdates response
+(``{"ok": true, "result": [...]}``) or one update per line. Each update is
+POSTed on its own, like Telegram does.
+
+    python3 post_webhook_updates.py updates.json \\
+        --url http://localhost:8069/telegram_monitor/webhook/1 \\
+        --secret <webhook secret of the configuration>
+"""
+
+import argparse
+import json
+import sys
+import time
+import urllib.error
+import urllib.request
+
+
+def load_updates(path):
+    with open(path, encoding='utf-8') as f:
+        content = f.read().strip()
+    if not content:
+        return []
+    if content[0] in '[{':
+        try:
+            data = json.loads(content)
+        except ValueError:
+            data = None
+        if isinstance(data, dict) and 'result' in data:
+            return data['result']
+        if isinstance(data, list):
+            return data
+        if isinstance(data, dict):
+            return [data]
+    return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+
+def post_update(url, secret, update):
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(update).encode('utf-8'),
+        headers={
+            'Content-Type': 'application/json',
+            'X-Telegram-Bot-Api-Secret-Token': secret,
+        },
+        method='POST',
+    )
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return response.status
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('file', help='recorded updates (JSON list, getUpdates response or JSON lines)')
+    parser.add_argument('--url', required=True, help='webhook URL of the telegram.config')
+    parser.add_argument('--secret', required=True, help='webhook secret of the telegram.config')
+    parser.add_argument('--delay', type=float, default=0.0, help='seconds to wait between updates')
+    args = parser.parse_args()
+
+    failures = 0
+    updates = load_updates(args.file)
+    for update in updates:
+        started = time.monotonic()
+        try:
+            status = post_update(args.url, args.secret, update)
+        except urllib.error.HTTPError as e:
+            status = e.code
+        elapsed = (time.monotonic() - started) * 1000
+        if status != 200:
+            failures += 1
+        print(f"update {update.get('update_id')}: HTTP {status} in {elapsed:.1f} ms")
+        if args.delay:
+            time.sleep(args.delay)
+
+    print(f"Posted {len(updates)} update(s), {failures} failure(s)")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+
+from . import test_offboarding
+from . import test_response_time
+from . import test_update_journal
+from . import test_webhook
+from . import test_metrics
+from . import test_message_count
+from . import test_setup_watchdog
+from . import test_ingestion
+from . import test_message_archive
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+import calendar
+
+from odoo.tests import TransactionCase, new_test_user
+
+
+class TelegramMonitorCase(TransactionCase):
+    """A bot configuration with a team source, a monitoring and a client group"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.config = cls.env['telegram.config'].create({
+            'name': 'Test Bot',
+            'bot_token': '123456:test-token',
+        })
+        Group = cls.env['telegram.group']
+        cls.team_group = Group.create({'name': 'Team', 'chat_id': '-1001', 'config_id': cls.config.id, 'group_type': 'internal'})
+        cls.alerts_group = Group.create({'name': 'Alerts', 'chat_id': '-1002', 'config_id': cls.config.id})
+        cls.client_group = Group.create({'name': 'Client', 'chat_id': '-1003', 'config_id': cls.config.id, 'group_type': 'client'})
+        cls.config.write({
+            'team_source_group_id': cls.team_group.id,
+            'monitoring_alerts_group_id': cls.alerts_group.id,
+        })
+        cls.internal_user = new_test_user(cls.env, login='telegram_monitor_user', groups='base.group_user')
+
+    @classmethod
+    def _create_member(cls, telegram_id, group, name=None, **vals):
+        user = cls.env['telegram.user'].search([('telegram_id', '=', telegram_id)]) or \
+            cls.env['telegram.user'].create({'telegram_id': telegram_id, 'name': name or f'User {telegram_id}'})
+        return cls.env['telegram.member'].create(dict(vals, user_id=user.id, group_id=group.id))
+
+    @staticmethod
+    def _message_update(update_id, message_id, group, telegram_id, date, text='Hello', reply_to=None):
+        """A Telegram ``message`` update sent by user ``telegram_id`` in ``group`` at ``date`` (UTC)"""
+        message = {
+            'message_id': message_id,
+            'from': {'id': int(telegram_id), 'is_bot': False, 'first_name': f'User {telegram_id}'},
+            'chat': {'id': int(group.chat_id), 'type': 'supergroup', 'title': group.name},
+            'date': calendar.timegm(date.timetuple()),
+            'text': text,
+        }
+        if reply_to:
+            message['reply_to_message'] = {'message_id': reply_to}
+        return {'update_id': update_id, 'message': message}
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import tagged
+
+from .common import TelegramMonitorCase
+
+
+@tagged('post_install', '-at_install')
+class TestBatchedIngestion(TelegramMonitorCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env['telegram.team.member'].create({'name': 'Support', 'telegram_id': '602'})
+
+    def _page(self, chat_id):
+        """Client questions, a duplicate delivery, a join and team answers in chat ``chat_id``"""
+        chat = self.env['telegram.group'].new({'name': f'Chat {chat_id}', 'chat_id': chat_id})
+        start = fields.Datetime.now().replace(microsecond=0) - timedelta(hours=1)
+        join = self._message_update(4, 4, chat, '604', start + timedelta(minutes=3), text=None)
+        del join['message']['text']
+        join['message']['new_chat_members'] = [{'id': 604, 'is_bot': False, 'first_name': 'User 604'}]
+        return [
+            self._message_update(1, 1, chat, '601', start),
+            self._message_update(2, 2, chat, '603', start + timedelta(minutes=1)),
+            self._message_update(3, 3, chat, '602', start + timedelta(minutes=2), text='On it', reply_to=1),
+            self._message_update(2, 2, chat, '603', start + timedelta(minutes=1)),
+            join,
+            self._message_update(5, 5, chat, '603', start + timedelta(minutes=4), text='Anyone?'),
+            self._message_update(6, 6, chat, '604', start + timedelta(minutes=5), text='Hi all'),
+            self._message_update(7, 7, chat, '602', start + timedelta(minutes=6), text='Done'),
+        ]
+
+    def _state(self, chat_id):
+        group = self.env['telegram.group'].search([('chat_id', '=', chat_id)])
+        domain = [('group_id', '=', group.id)]
+        return {
+            'messages': sorted(self.env['telegram.message'].search(domain).mapped(lambda m: (
+                m.message_id, m.member_id.telegram_id, m.message_text or '', m.message_date,
+                m.is_from_team, m.reply_to_message_id or ''))),
+            'members': sorted(self.env['telegram.member'].search(domain).mapped(
+                lambda m: (m.telegram_id, m.is_team_member, m.is_active))),
+            'message_count': group.message_count,
+            'response_times': sorted(self.env['telegram.response.time'].search(domain).mapped(lambda r: (
+                r.client_message_id.message_id, r.client_member_id.telegram_id, r.state,
+                r.response_type or '', r.response_seconds, r.responder_id.telegram_id or ''))),
+        }
+
+    def test_batched_page_matches_update_by_update(self):
+        self.config._process_updates(self._page('-3001'))
+        for update in self._page('-3002'):
+            self.config._process_updates([update])
+
+        batched = self._state('-3001')
+        self.assertEqual(batched, self._state('-3002'))
+        self.assertEqual(batched['message_count'], 7)
+        self.assertEqual(len(batched['members']), 4)
+        self.assertEqual(
+            [(message_id, state, response_type, seconds) for message_id, _client, state, response_type, seconds, _by
+             in batched['response_times']],
+            [('1', 'responded', 'reply', 120), ('2', 'responded', 'next', 300), ('4', 'responded', 'next', 180),
+             ('5', 'responded', 'next', 120), ('6', 'responded', 'next', 60)])
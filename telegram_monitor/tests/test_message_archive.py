@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import tagged
+
+from .common import TelegramMonitorCase
+
+
+@tagged('post_install', '-at_install')
+class TestMessageArchive(TelegramMonitorCase):
+
+    def test_archive_moves_old_messages_only(self):
+        now = fields.Datetime.now().replace(microsecond=0)
+        old, recent = now - timedelta(days=40), now - timedelta(days=1)
+        self.config._process_updates([
+            self._message_update(1, 11, self.client_group, '601', old, text='Old question'),
+            self._message_update(2, 12, self.client_group, '601', recent, text='New question'),
+        ])
+        group_messages = [('group_id', '=', self.client_group.id)]
+        response_times = self.env['telegram.response.time'].search(group_messages)
+
+        moved = self.env['telegram.message.archive']._archive_messages(self.config, now - timedelta(days=30))
+
+        self.assertEqual(moved, 1)
+        self.assertEqual(self.env['telegram.message'].search(group_messages).mapped('message_id'), ['12'])
+        archived = self.env['telegram.message.archive'].search(group_messages)
+        self.assertEqual((archived.message_id, archived.message_text, archived.message_date, archived.member_id.telegram_id),
+                         ('11', 'Old question', old, '601'))
+        self.assertEqual(self.client_group.message_count, 2)
+        # Response times outlive their archived client message
+        self.assertEqual(len(response_times.exists()), 2)
+        self.assertEqual(sorted(response_times.mapped('client_date')), [old, recent])
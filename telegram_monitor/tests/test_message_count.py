@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import tagged
+
+from .common import TelegramMonitorCase
+
+
+@tagged('post_install', '-at_install')
+class TestMessageCount(TelegramMonitorCase):
+
+    def setUp(self):
+        super().setUp()
+        now = fields.Datetime.now().replace(microsecond=0)
+        self.config._process_updates([
+            self._message_update(1, 11, self.client_group, '601', now - timedelta(minutes=2)),
+            self._message_update(2, 12, self.client_group, '602', now - timedelta(minutes=1)),
+            self._message_update(3, 13, self.client_group, '602', now),
+        ])
+        self.assertEqual(self.client_group.message_count, 3)
+
+    def test_member_unlink_recounts_cascaded_messages(self):
+        self.env['telegram.member'].search([
+            ('telegram_id', '=', '602'), ('group_id', '=', self.client_group.id)]).unlink()
+        self.assertEqual(self.client_group.message_count, 1)
+
+    def test_user_unlink_recounts_cascaded_messages(self):
+        self.env['telegram.user'].search([('telegram_id', '=', '601')]).unlink()
+        self.assertEqual(self.client_group.message_count, 2)
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+from odoo import fields
+from odoo.tests import tagged
+
+from .common import TelegramMonitorCase
+from ..tools import metrics
+
+
+@tagged('post_install', '-at_install')
+class TestSharedMetrics(TelegramMonitorCase):
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.shared_dir = directory.name
+        patcher = patch.object(metrics, 'shared_dir', lambda: self.shared_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_processed_updates_are_published(self):
+        now = fields.Datetime.now().replace(microsecond=0)
+        self.config._process_updates([self._message_update(1, 11, self.client_group, '601', now)])
+
+        with open(os.path.join(self.shared_dir, f'{os.getpid()}.json')) as f:
+            snapshot = json.load(f)
+        self.assertIn([str(self.config.id), 'message', 'handled'],
+                      [key for key, _value in snapshot[metrics.UPDATES.name]])
+
+    def test_render_includes_other_workers(self):
+        with open(os.path.join(self.shared_dir, '1.json'), 'w') as f:
+            json.dump({metrics.UPDATES.name: [[['7', 'message', 'handled'], 3]]}, f)
+
+        text = metrics.render()
+
+        self.assertIn('telegram_monitor_updates_total{pid="1",config="7",type="message",outcome="handled"} 3', text)
+        self.assertIn(f'pid="{os.getpid()}"', text)
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import tagged
+
+from .common import TelegramMonitorCase
+
+
+@tagged('post_install', '-at_install')
+class TestOffboarding(TelegramMonitorCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Left the team group, still in a client group
+        cls.leaver = cls._create_member('501', cls.team_group, is_active=False)
+        cls.leaver_client = cls._create_member('501', cls.client_group)
+        cls.env['telegram.team.member'].create({'name': 'Leaver', 'telegram_id': '501'})
+        cls.Outbound = cls.env['telegram.outbound.message']
+
+    def test_sync_reports_leavers_as_internal_user(self):
+        self.config.offboarding_auto_remove = True
+        self.config.with_user(self.internal_user).action_sync_team_members()
+
+        team_member = self.env['telegram.team.member'].search([('telegram_id', '=', '501')])
+        self.assertFalse(team_member.is_active)
+        alert = self.Outbound.search([('chat_id', '=', self.alerts_group.chat_id), ('kind', '=', 'alert')])
+        self.assertEqual(len(alert), 1)
+        self.assertIn('Client', alert.text)
+        kick = self.Outbound.search([('method', '=', 'kick_member')])
+        self.assertEqual((kick.chat_id, kick.target_user_id), (self.client_group.chat_id, '501'))
+
+    def test_remove_from_group_as_internal_user(self):
+        self.leaver_client.with_user(self.internal_user).action_remove_from_group()
+
+        kick = self.Outbound.search([('method', '=', 'kick_member')])
+        self.assertEqual((kick.chat_id, kick.target_user_id), (self.client_group.chat_id, '501'))
+        self.assertEqual(kick.config_id, self.config)
+
+    def test_replayed_departure_does_not_alert(self):
+        self._create_member('502', self.team_group)
+        self._create_member('502', self.client_group)
+        self.env['telegram.team.member'].create({'name': 'Replayed', 'telegram_id': '502'})
+
+        self.config.with_context(telegram_replay=True)._process_member_leave('502', self.team_group)
+
+        team_member = self.env['telegram.team.member'].search([('telegram_id', '=', '502')])
+        self.assertFalse(team_member.is_active)
+        self.assertFalse(self.Outbound.search([]))
+
+        self.config._deactivate_team_member('502')
+        self.assertTrue(self.Outbound.search([('kind', '=', 'alert')]))
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import tagged
+
+from .common import TelegramMonitorCase
+
+
+@tagged('post_install', '-at_install')
+class TestResponseTimeRebuild(TelegramMonitorCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env['telegram.team.member'].create({'name': 'Support', 'telegram_id': '602'})
+        cls.client = cls._create_member('601', cls.client_group)
+        cls.support = cls._create_member('602', cls.client_group)
+        cls.now = fields.Datetime.now().replace(microsecond=0)
+
+    def _exchange(self, message_id, date, answer_after):
+        self.env['telegram.message'].create([{
+            'message_id': str(message_id), 'group_id': self.client_group.id,
+            'member_id': self.client.id, 'message_date': date,
+        }, {
+            'message_id': str(message_id + 1), 'group_id': self.client_group.id,
+            'member_id': self.support.id, 'message_date': date + answer_after,
+        }])
+
+    def _stats(self):
+        ResponseTime = self.env['telegram.response.time']
+        SlaDaily = self.env['telegram.sla.daily']
+        return (
+            sorted(ResponseTime.search([('group_id', '=', self.client_group.id)]).mapped(
+                lambda r: (r.client_date, r.state, r.response_seconds))),
+            sorted(SlaDaily.search([('group_id', '=', self.client_group.id)]).mapped(
+                lambda s: (s.day, s.message_count, s.responded_count))),
+        )
+
+    def test_rebuild_keeps_archived_history(self):
+        self._exchange(1, self.now - timedelta(days=10), timedelta(minutes=5))
+        self._exchange(3, self.now - timedelta(days=1), timedelta(minutes=10))
+        before = self._stats()
+        self.assertEqual(len(before[0]), 2)
+
+        moved = self.env['telegram.message.archive']._archive_messages(self.config, self.now - timedelta(days=5))
+        self.assertEqual(moved, 2)
+        self.env['telegram.response.time']._rebuild_for_groups(self.client_group)
+
+        self.assertEqual(self._stats(), before)
+
+    def test_rebuild_pairs_late_imports_chronologically(self):
+        t1 = self.now - timedelta(hours=3)
+        t2 = self.now - timedelta(hours=1)
+        # Stored out of order: the older exchange was imported after the recent one
+        for message_id, member, date in [(10, self.client, t2), (2, self.support, t1 + timedelta(minutes=3)),
+                                         (1, self.client, t1), (11, self.support, t2 + timedelta(minutes=5))]:
+            self.env['telegram.message'].create({
+                'message_id': str(message_id), 'group_id': self.client_group.id,
+                'member_id': member.id, 'message_date': date,
+            })
+
+        self.env['telegram.response.time']._rebuild_for_groups(self.client_group, batch_size=2)
+
+        self.assertEqual(self._stats()[0], [(t1, 'responded', 180), (t2, 'responded', 300)])
+
+
+@tagged('post_install', '-at_install')
+class TestResponseTimeTracking(TelegramMonitorCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env['telegram.team.member'].create({'name': 'Support', 'telegram_id': '602'})
+        cls.config.sla_response_minutes = 5
+        # Same day for every message
+        cls.start = fields.Datetime.now().replace(hour=10, minute=0, second=0, microsecond=0) - timedelta(days=1)
+
+    def _records(self):
+        return self.env['telegram.response.time'].search([('group_id', '=', self.client_group.id)])
+
+    def test_answers_follow_across_pages(self):
+        self.config._process_updates([
+            self._message_update(1, 1, self.client_group, '601', self.start),
+            self._message_update(2, 2, self.client_group, '603', self.start + timedelta(minutes=1)),
+        ])
+        self.assertEqual(self._records().mapped('state'), ['pending', 'pending'])
+
+        # An explicit reply only answers the pending messages of that client
+        self.config._process_updates([
+            self._message_update(3, 3, self.client_group, '602', self.start + timedelta(minutes=3), reply_to=2),
+        ])
+        second, first = self._records()
+        self.assertEqual((first.state, second.state), ('pending', 'responded'))
+        self.assertEqual((second.response_type, second.response_seconds, second.sla_breached), ('reply', 120, False))
+
+        self.config._process_updates([
+            self._message_update(4, 4, self.client_group, '602', self.start + timedelta(minutes=10)),
+        ])
+        self.assertEqual((first.state, first.response_type, first.response_seconds, first.sla_breached),
+                         ('responded', 'next', 600, True))
+        self.assertEqual(second.response_seconds, 120)
+        day = self.env['telegram.sla.daily'].search([('group_id', '=', self.client_group.id)])
+        self.assertEqual((day.message_count, day.responded_count), (2, 2))
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+from unittest.mock import patch
+
+from odoo import fields
+from odoo.tests import tagged
+
+from .common import TelegramMonitorCase
+from ..tools.telegram_api import TelegramApiClient, TelegramApiError
+
+
+@tagged('post_install', '-at_install')
+class TestSetupWatchdog(TelegramMonitorCase):
+
+    def _pending_group(self, config, chat_id):
+        return self.env['telegram.group'].create({
+            'name': f'Pending {chat_id}',
+            'chat_id': chat_id,
+            'config_id': config.id,
+            'setup_status': 'pending',
+            'setup_started_at': fields.Datetime.now() - timedelta(hours=2),
+        })
+
+    def test_broken_configuration_does_not_stop_the_others(self):
+        broken = self.env['telegram.config'].create({
+            'name': 'Revoked Bot',
+            'bot_token': '654321:revoked-token',
+        })
+        self.config.setup_watchdog_recheck = False
+        broken_group = self._pending_group(broken, '-2001')
+        group = self._pending_group(self.config, '-2002')
+
+        with patch.object(TelegramApiClient, 'get_me', side_effect=TelegramApiError('getMe', 'Unauthorized', 401)):
+            self.env['telegram.config']._cron_setup_watchdog()
+
+        self.assertEqual(broken_group.setup_status, 'pending')
+        self.assertEqual(group.setup_status, 'delayed')
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import tagged
+
+from .common import TelegramMonitorCase
+
+
+@tagged('post_install', '-at_install')
+class TestJournalReplay(TelegramMonitorCase):
+
+    def test_replay_skips_archived_messages(self):
+        old = fields.Datetime.now().replace(microsecond=0) - timedelta(days=10)
+        self.config._process_updates([self._message_update(1, 11, self.client_group, '601', old)])
+        group_messages = [('group_id', '=', self.client_group.id)]
+        self.assertEqual(self.client_group.message_count, 1)
+
+        self.env['telegram.message.archive']._archive_messages(self.config, old + timedelta(days=5))
+        self.assertFalse(self.env['telegram.message'].search(group_messages))
+
+        replayed = self.env['telegram.update.journal']._replay(self.config)
+
+        self.assertEqual(replayed, 1)
+        self.assertFalse(self.env['telegram.message'].search(group_messages))
+        self.assertEqual(self.env['telegram.message.archive'].search_count(group_messages), 1)
+        self.assertEqual(self.client_group.message_count, 1)
+        self.assertEqual(self.env['telegram.response.time'].search_count(group_messages), 1)
+
+    def test_pages_are_journaled_and_replayed(self):
+        now = fields.Datetime.now().replace(microsecond=0)
+        updates = [
+            self._message_update(7, 21, self.client_group, '601', now - timedelta(minutes=2)),
+            self._message_update(8, 22, self.client_group, '601', now - timedelta(minutes=1)),
+        ]
+        self.config._process_updates(updates)
+        page = self.env['telegram.update.journal'].search([('config_id', '=', self.config.id)])
+        self.assertEqual((page.first_update_id, page.last_update_id, page.update_count), (7, 8, 2))
+        self.assertEqual(page._get_updates(), updates)
+        self.assertEqual(self.config.last_update_id, 8)
+
+        group_messages = [('group_id', '=', self.client_group.id)]
+        self.env['telegram.message'].search(group_messages + [('message_id', '=', '22')]).unlink()
+        self.config.last_update_id = 100
+
+        replayed = self.env['telegram.update.journal']._replay(self.config)
+
+        self.assertEqual(replayed, 2)
+        self.assertEqual(sorted(self.env['telegram.message'].search(group_messages).mapped('message_id')), ['21', '22'])
+        self.assertEqual(self.env['telegram.update.journal'].search_count([('config_id', '=', self.config.id)]), 1)
+        self.assertEqual(self.config.last_update_id, 100)
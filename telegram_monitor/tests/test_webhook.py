@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+import json
+
+from odoo import fields
+from odoo.tests import HttpCase, tagged
+
+from .common import TelegramMonitorCase
+
+
+@tagged('post_install', '-at_install')
+class TestWebhook(TelegramMonitorCase, HttpCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.config.write({
+            'update_mode': 'webhook',
+            'webhook_secret': 'test-secret',
+            'last_update_id': 5,
+        })
+
+    def _post(self, update, secret='test-secret'):
+        return self.url_open(
+            f'/telegram_monitor/webhook/{self.config.id}', data=json.dumps(update),
+            headers={'Content-Type': 'application/json', 'X-Telegram-Bot-Api-Secret-Token': secret})
+
+    def test_webhook_does_not_write_polling_offset(self):
+        now = fields.Datetime.now().replace(microsecond=0)
+        response = self._post(self._message_update(42, 11, self.client_group, '601', now))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.env['telegram.message'].search_count([('group_id', '=', self.client_group.id)]), 1)
+        self.config.invalidate_recordset(['last_update_id'])
+        self.assertEqual(self.config.last_update_id, 5)
+
+    def test_webhook_rejects_wrong_secret(self):
+        now = fields.Datetime.now().replace(microsecond=0)
+        response = self._post(self._message_update(42, 11, self.client_group, '601', now), secret='wrong')
+
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(self.env['telegram.message'].search([('group_id', '=', self.client_group.id)]))
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""Streaming export of messages and SLA data
+
+Rows are read through a PostgreSQL server-side (named) cursor, ``chunk_size``
+at a time, and every chunk is written out before the next one is fetched,
+so memory use does not depend on the number of rows exported. Used by the
+``/telegram_monitor/export`` endpoint and the ``telegram_export`` command.
+
+CSV and NDJSON are produced as a stream of bytes. Parquet needs pyarrow and
+a file to write to; each chunk becomes one row group.
+"""
+
+import csv
+import datetime
+import io
+import json
+import uuid
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+CHUNK_SIZE = 5000
+FORMATS = ('csv', 'ndjson', 'parquet')
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+# Every dataset is a list of (column, type) and a query taking the
+# date_from, date_to, all_groups and group_ids parameters
+DATASETS = {
+    'messages': ([
+        ('message_id', 'str'), ('message_date', 'datetime'),
+        ('group_chat_id', 'str'), ('group_name', 'str'), ('group_type', 'str'),
+        ('member_telegram_id', 'str'), ('member_name', 'str'), ('member_username', 'str'),
+        ('is_from_team', 'bool'), ('member_is_team_member', 'bool'),
+        ('is_reply', 'bool'), ('reply_to_message_id', 'str'), ('message_text', 'str'),
+        ('archived', 'bool'),
+    ], """
+        SELECT m.message_id, m.message_date, g.chat_id, g.name, g.group_type,
+               mb.telegram_id, mu.name, mu.username,
+               m.is_from_team, mb.is_team_member, m.is_reply, m.reply_to_message_id, m.message_text,
+               m.archived
+          FROM (
+                SELECT group_id, member_id, message_id, message_date, is_from_team, is_reply,
+                       reply_to_message_id, message_text, false AS archived
+                  FROM telegram_message
+                 WHERE (%(date_from)s IS NULL OR message_date >= %(date_from)s)
+                   AND (%(date_to)s IS NULL OR message_date < %(date_to)s)
+                   AND (%(all_groups)s OR group_id = ANY(%(group_ids)s))
+             UNION ALL
+                SELECT group_id, member_id, message_id, message_date, is_from_team, is_reply,
+                       reply_to_message_id, message_text, true
+                  FROM telegram_message_archive
+                 WHERE (%(date_from)s IS NULL OR message_date >= %(date_from)s)
+                   AND (%(date_to)s IS NULL OR message_date < %(date_to)s)
+                   AND (%(all_groups)s OR group_id = ANY(%(group_ids)s))
+               ) m
+          JOIN telegram_group g ON g.id = m.group_id
+     LEFT JOIN telegram_member mb ON mb.id = m.member_id
+     LEFT JOIN telegram_user mu ON mu.id = mb.user_id
+      ORDER BY m.group_id, m.message_date
+    """),
+    'response_times': ([
+        ('group_chat_id', 'str'), ('group_name', 'str'),
+        ('client_date', 'datetime'), ('client_telegram_id', 'str'), ('client_name', 'str'),
+        ('response_date', 'datetime'), ('responder_telegram_id', 'str'), ('responder_name', 'str'),
+        ('response_type', 'str'), ('response_seconds', 'int'), ('sla_breached', 'bool'), ('state', 'str'),
+    ], """
+        SELECT g.chat_id, g.name, rt.client_date, client.telegram_id, client_user.name,
+               rt.response_date, responder.telegram_id, responder_user.name,
+               rt.response_type, rt.response_seconds, rt.sla_breached, rt.state
+          FROM telegram_response_time rt
+          JOIN telegram_group g ON g.id = rt.group_id
+     LEFT JOIN telegram_member client ON client.id = rt.client_member_id
+     LEFT JOIN telegram_member responder ON responder.id = rt.responder_id
+     LEFT JOIN telegram_user client_user ON client_user.id = client.user_id
+     LEFT JOIN telegram_user responder_user ON responder_user.id = responder.user_id
+         WHERE (%(date_from)s IS NULL OR rt.client_date >= %(date_from)s)
+           AND (%(date_to)s IS NULL OR rt.client_date < %(date_to)s)
+           AND (%(all_groups)s OR rt.group_id = ANY(%(group_ids)s))
+      ORDER BY rt.group_id, rt.client_date
+    """),
+    'sla_daily': ([
+        ('day', 'date'), ('group_chat_id', 'str'), ('group_name', 'str'),
+        ('team_member_telegram_id', 'str'), ('team_member_name', 'str'),
+        ('message_count', 'int'), ('responded_count', 'int'), ('breach_count', 'int'),
+        ('response_p50', 'float'), ('response_p90', 'float'), ('response_max', 'float'),
+    ], """
+        SELECT s.day, g.chat_id, g.name, tm.telegram_id, tm.name,
+               s.message_count, s.responded_count, s.breach_count,
+               s.response_p50, s.response_p90, s.response_max
+          FROM telegram_sla_daily s
+          JOIN telegram_group g ON g.id = s.group_id
+     LEFT JOIN telegram_team_member tm ON tm.id = s.team_member_id
+         WHERE (%(date_from)s IS NULL OR s.day >= %(date_from)s::date)
+           AND (%(date_to)s IS NULL OR s.day < %(date_to)s::date)
+           AND (%(all_groups)s OR s.group_id = ANY(%(group_ids)s))
+      ORDER BY s.day, s.group_id
+    """),
+}
+
+
+def iter_chunks(cr, dataset, date_from=None, date_to=None, group_ids=None, chunk_size=CHUNK_SIZE):
+    """Yield the rows of a dataset as lists of at most ``chunk_size`` tuples
+
+    ``date_from`` is inclusive, ``date_to`` exclusive; ``group_ids`` are
+    telegram.group IDs, all groups when empty.
+    """
+    _columns, query = DATASETS[dataset]
+    params = {
+        'date_from': date_from,
+        'date_to': date_to,
+        'all_groups': not group_ids,
+        'group_ids': list(group_ids or [0]),
+    }
+    # A named cursor keeps the result set on the server
+    with cr._cnx.cursor(name=f'telegram_export_{uuid.uuid4().hex}') as named_cr:
+        named_cr.itersize = chunk_size
+        named_cr.execute(query, params)
+        while True:
+            rows = named_cr.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield rows
+
+
+def stream(cr, dataset, fmt, **filters):
+    """Yield a CSV or NDJSON export as chunks of bytes"""
+    columns = [name for name, _type in DATASETS[dataset][0]]
+    chunks = iter_chunks(cr, dataset, **filters)
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for rows in chunks:
+            writer.writerows([_format_value(value) for value in row] for row in rows)
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue().encode()
+    elif fmt == 'ndjson':
+        for rows in chunks:
+            yield ''.join(
+                json.dumps(dict(zip(columns, row)), default=_format_value, ensure_ascii=False) + '\n'
+                for row in rows
+            ).encode()
+    else:
+        raise ValueError(f"{fmt} cannot be streamed, use write_parquet")
+
+
+def write_parquet(cr, dataset, path, **filters):
+    """Write a dataset to a Parquet file, one row group per chunk
+
+    Returns the number of rows written.
+    """
+    if pyarrow is None:
+        raise RuntimeError("Parquet export needs the pyarrow package")
+    arrow_types = {
+        'str': pyarrow.string(), 'int': pyarrow.int64(), 'float': pyarrow.float64(),
+        'bool': pyarrow.bool_(), 'datetime': pyarrow.timestamp('us'), 'date': pyarrow.date32(),
+    }
+    column_types = DATASETS[dataset][0]
+    schema = pyarrow.schema([(name, arrow_types[type_]) for name, type_ in column_types])
+    count = 0
+    with pyarrow.parquet.ParquetWriter(path, schema) as writer:
+        for rows in iter_chunks(cr, dataset, **filters):
+            columns = list(zip(*rows))
+            writer.write_table(pyarrow.Table.from_arrays(
+                [pyarrow.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            count += len(rows)
+    return count
+
+
+def _format_value(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return value
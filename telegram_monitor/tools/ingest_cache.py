@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""Per-process LRU caches used while ingesting updates
+
+``GROUP_CACHE`` maps ``(dbname, config_id, chat_id)`` to a telegram.group ID,
+``MEMBER_CACHE`` maps ``(dbname, group_id, telegram_id)`` to a
+telegram.member ID and ``USER_CACHE`` maps ``(dbname, telegram_id)`` to a
+telegram.user ID and the profile last written for it. Entries are only
+added once the transaction that read or created the row has committed, and
+are dropped when the row is deleted. Deletions made by other workers reach
+this process through a database sequence bumped after they commit, see
+:func:`signal_after_commit` and :func:`check_signals`.
+"""
+
+import threading
+from collections import OrderedDict
+from functools import partial
+
+
+class LRUCache:
+    """Bounded, thread-safe LRU mapping with hit/miss counters"""
+
+    def __init__(self, name, maxsize):
+        self.name = name
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._data.move_to_end(key)
+            return value
+
+    def update(self, items):
+        with self._lock:
+            for key, value in items.items():
+                self._data[key] = value
+                self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop_where(self, predicate):
+        """Drop every entry for which ``predicate(key, value)`` is true"""
+        with self._lock:
+            for key in [key for key, value in self._data.items() if predicate(key, value)]:
+                del self._data[key]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'name': self.name,
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+        }
+
+
+GROUP_CACHE = LRUCache('group', 10000)
+MEMBER_CACHE = LRUCache('member', 100000)
+USER_CACHE = LRUCache('user', 100000)
+
+# Bumped once per transaction that deleted (or re-keyed) cached rows
+SIGNAL_SEQUENCE = 'telegram_monitor_ingest_cache_signaling'
+_CHECKED_KEY = 'telegram_monitor.ingest_cache_checked'
+_SIGNAL_KEY = 'telegram_monitor.ingest_cache_signal'
+
+_registry_markers = {}
+
+
+def create_signal_sequence(cr):
+    cr.execute(f"CREATE SEQUENCE IF NOT EXISTS {SIGNAL_SEQUENCE}")
+
+
+def check_signals(cr, registry):
+    """Forget a database's entries when its registry was reloaded or signaled
+
+    A new registry (module update) or a bump of the signaling sequence
+    (another worker deleted a group, member or user) means cached IDs may
+    be stale. The sequence is read at most once per transaction: rows
+    deleted by transactions committed later are not in its snapshot
+    anyway.
+    """
+    if cr.postcommit.data.get(_CHECKED_KEY):
+        return
+    cr.execute(f"SELECT last_value FROM {SIGNAL_SEQUENCE}")
+    marker = (id(registry), cr.fetchone()[0])
+    if _registry_markers.get(registry.db_name) != marker:
+        invalidate_database(registry.db_name)
+        _registry_markers[registry.db_name] = marker
+    cr.postcommit.data[_CHECKED_KEY] = True
+
+
+def signal_after_commit(cr, registry):
+    """Make the other workers drop this database's entries once the current transaction commits
+
+    Callers drop their own entries right away with ``pop_where``; the
+    sequence is bumped once per transaction, whatever the number of calls.
+    """
+    if not cr.postcommit.data.get(_SIGNAL_KEY):
+        cr.postcommit.data[_SIGNAL_KEY] = True
+        cr.postcommit.add(partial(_signal, registry))
+
+
+def _signal(registry):
+    with registry.cursor() as cr:
+        cr.execute(f"SELECT nextval('{SIGNAL_SEQUENCE}')")
+        value = cr.fetchone()[0]
+    if _registry_markers.get(registry.db_name) == (id(registry), value - 1):
+        # Nobody else signaled meanwhile: this process already dropped its entries
+        _registry_markers[registry.db_name] = (id(registry), value)
+
+
+def invalidate_database(dbname):
+    GROUP_CACHE.pop_where(lambda key, _value: key[0] == dbname)
+    MEMBER_CACHE.pop_where(lambda key, _value: key[0] == dbname)
+    USER_CACHE.pop_where(lambda key, _value: key[0] == dbname)
+
+
+def update_after_commit(cr, cache, items):
+    """Add entries once the current transaction has committed"""
+    if items:
+        cr.postcommit.add(partial(cache.update, items))
+
+
+def invalidate_after_commit(cr):
+    """Forget this database's entries once the current transaction commits
+
+    Used when a savepoint was rolled back: entries queued by
+    :func:`update_after_commit` inside it would point to rows that do not
+    exist. Callbacks run in order, so entries queued later are kept.
+    """
+    cr.postcommit.add(partial(invalidate_database, cr.dbname))
+
+
+def all_stats():
+    return [GROUP_CACHE.stats(), MEMBER_CACHE.stats(), USER_CACHE.stats()]
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""In-process ingestion metrics rendered in the Prometheus text format
+
+Counters and histograms live in the memory of the process that records
+them: the HTTP workers for webhook updates, the cron or ``telegram_poll``
+worker for polled ones. :func:`publish` writes a snapshot of them to a file
+per process in the ``telegram_monitor_metrics`` directory of the Odoo data
+directory, and :func:`render` merges the snapshots of every process into
+the exposition text served by ``/telegram_monitor/metrics`` and by
+``telegram_poll --metrics-port``, so any worker reports the metrics of all
+of them. Every sample carries a ``pid`` label so the series of several
+Odoo workers can be summed on the Prometheus side.
+"""
+
+import json
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from odoo.tools import config
+
+_logger = logging.getLogger(__name__)
+
+# Seconds; wide enough for a single handler call as well as a long-polled getUpdates
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+LAG_BUCKETS = (0.5, 1, 2, 5, 10, 30, 60, 120, 300, 900, 3600)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Counter:
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def snapshot(self):
+        """JSON-serializable copy of the recorded values"""
+        with self._lock:
+            return sorted([list(key), value] for key, value in self._values.items())
+
+    def samples(self, snapshot):
+        for key, value in snapshot:
+            yield f"{self.name}_total", dict(zip(self.labelnames, key)), value
+
+
+class Histogram:
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DURATION_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, amount=1, **labels):
+        """Record ``amount`` observations of ``value``"""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += amount
+            state[1] += value * amount
+            state[2] += amount
+
+    def snapshot(self):
+        """JSON-serializable copy of the recorded values"""
+        with self._lock:
+            return sorted([list(key), list(counts), total, count]
+                          for key, (counts, total, count) in self._values.items())
+
+    def samples(self, snapshot):
+        for key, counts, total, count in snapshot:
+            labels = dict(zip(self.labelnames, key))
+            for bound, bucket_count in zip(self.buckets, counts):
+                yield f"{self.name}_bucket", {**labels, 'le': _format_value(bound)}, bucket_count
+            yield f"{self.name}_bucket", {**labels, 'le': '+Inf'}, count
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, count
+
+
+UPDATES = Counter(
+    'telegram_monitor_updates', "Telegram updates by type and outcome (handled, skipped, failed)",
+    ('config', 'type', 'outcome'))
+UPDATE_DURATION = Histogram(
+    'telegram_monitor_update_duration_seconds',
+    "Time spent handling an update; batched messages share the batch time", ('type',))
+UPDATE_QUERIES = Histogram(
+    'telegram_monitor_update_queries', "SQL queries issued per update; batched messages share the batch queries",
+    ('type',), buckets=QUERY_BUCKETS)
+POLL_LAG = Histogram(
+    'telegram_monitor_poll_lag_seconds', "Delay between a message's date and its ingestion",
+    ('config',), buckets=LAG_BUCKETS)
+API_REQUESTS = Counter(
+    'telegram_monitor_api_requests', "Telegram Bot API calls by method and outcome (ok, error)",
+    ('method', 'outcome'))
+API_DURATION = Histogram(
+    'telegram_monitor_api_request_duration_seconds', "Telegram Bot API call latency", ('method',))
+
+REGISTRY = (UPDATES, UPDATE_DURATION, UPDATE_QUERIES, POLL_LAG, API_REQUESTS, API_DURATION)
+
+
+def update_type(update):
+    """Metric name of the kind of an update, splitting out member join/leave messages"""
+    for kind in ('callback_query', 'my_chat_member', 'chat_member'):
+        if update.get(kind):
+            return kind
+    message = update.get('message') or update.get('channel_post')
+    if not message:
+        return 'other'
+    if message.get('new_chat_members') or message.get('left_chat_member'):
+        return 'member_message'
+    return 'message'
+
+
+def shared_dir():
+    """Directory holding the metric snapshots of every process"""
+    return os.path.join(config['data_dir'], 'telegram_monitor_metrics')
+
+
+def publish():
+    """Write the metrics of this process to its snapshot file in :func:`shared_dir`
+
+    The file is replaced atomically, so a concurrent :func:`render` reads
+    either the previous snapshot or the new one. Failures are only logged:
+    metrics must never break ingestion.
+    """
+    directory = shared_dir()
+    path = os.path.join(directory, f'{os.getpid()}.json')
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump({metric.name: metric.snapshot() for metric in REGISTRY}, f)
+        os.replace(f'{path}.tmp', path)
+    except OSError as e:
+        _logger.warning(f"Could not publish Telegram metrics to {directory}: {e}")
+
+
+def _read_snapshots():
+    """Return the published snapshots by pid, with the live values of this process"""
+    snapshots = {}
+    directory = shared_dir()
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        names = []
+    for name in names:
+        pid, ext = os.path.splitext(name)
+        if ext != '.json' or not pid.isdigit():
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                snapshots[pid] = json.load(f)
+        except (OSError, ValueError):
+            # Removed or being replaced meanwhile
+            continue
+    snapshots[str(os.getpid())] = {metric.name: metric.snapshot() for metric in REGISTRY}
+    return snapshots
+
+
+def render():
+    """Return the metrics of every published process in the Prometheus text format"""
+    snapshots = sorted(_read_snapshots().items(), key=lambda item: int(item[0]))
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        for pid, snapshot in snapshots:
+            for name, labels, value in metric.samples(snapshot.get(metric.name, [])):
+                labels = {'pid': pid, **labels}
+                label_text = ','.join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+                lines.append(f"{name}{{{label_text}}} {_format_value(value)}")
+    return '\n'.join(lines) + '\n'
+
+
+def start_http_server(port, host='127.0.0.1'):
+    """Serve :func:`render` on ``http://host:port/metrics`` from a daemon thread"""
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='telegram_monitor.metrics', daemon=True).start()
+    return server
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return repr(value)
+    return str(value)
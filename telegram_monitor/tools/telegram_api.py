@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import metrics
+
+_logger = logging.getLogger(__name__)
+
+TELEGRAM_API_URL = 'https://api.telegram.org'
+# Seconds to wait for Telegram on regular (non long-poll) calls
+DEFAULT_TIMEOUT = 10
+# Keep-alive connections kept open per bot token
+POOL_SIZE = 10
+# getChatMember answers kept before expired ones are pruned
+CHAT_MEMBER_CACHE_SIZE = 1000
+
+
+class TelegramApiError(Exception):
+    """A Telegram Bot API call failed
+
+    ``error_code`` is the HTTP/Telegram error code, or None when Telegram
+    could not be reached at all. ``retry_after`` is set on 429 responses.
+    """
+
+    def __init__(self, method, description, error_code=None, retry_after=None):
+        super().__init__(f"{method}: {description}")
+        self.method = method
+        self.description = description
+        self.error_code = error_code
+        self.retry_after = retry_after
+
+
+class TelegramApiClient:
+    """Telegram Bot API client with a pooled keep-alive session per bot token
+
+    Use :meth:`for_token` to get the shared client of a bot. All calls go
+    through :meth:`call`, which applies the timeout and turns transport
+    errors and ``ok=false`` answers into :class:`TelegramApiError`.
+
+    Since a client lives as long as the process, it also caches the bot's
+    own identity (``bot_info``) and recent ``getChatMember`` answers.
+    """
+
+    _clients = {}
+    _clients_lock = threading.Lock()
+
+    def __init__(self, token, base_url=TELEGRAM_API_URL):
+        self.token = token
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.bot_info = None
+        self._chat_members = {}
+        self._chat_members_lock = threading.Lock()
+
+    @classmethod
+    def for_token(cls, token, base_url=TELEGRAM_API_URL):
+        """Return the process-wide client of a bot token"""
+        key = (token, base_url)
+        client = cls._clients.get(key)
+        if client is None:
+            with cls._clients_lock:
+                client = cls._clients.get(key)
+                if client is None:
+                    client = cls._clients[key] = cls(token, base_url)
+        return client
+
+    def call(self, method, payload=None, timeout=DEFAULT_TIMEOUT):
+        """Call a Bot API method and return its ``result``"""
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            result = self._call(method, payload, timeout)
+            outcome = 'ok'
+            return result
+        finally:
+            metrics.API_REQUESTS.inc(method=method, outcome=outcome)
+            metrics.API_DURATION.observe(time.perf_counter() - started, method=method)
+
+    def _call(self, method, payload, timeout):
+        url = f"{self.base_url}/bot{self.token}/{method}"
+        try:
+            response = self.session.post(url, json=payload or {}, timeout=timeout)
+        except requests.exceptions.RequestException as e:
+            raise TelegramApiError(method, str(e)) from e
+
+        try:
+            data = response.json()
+        except ValueError:
+            raise TelegramApiError(method, f"invalid response (HTTP {response.status_code})",
+                                   error_code=response.status_code)
+
+        if not data.get('ok'):
+            parameters = data.get('parameters') or {}
+            raise TelegramApiError(
+                method,
+                data.get('description', 'Unknown error'),
+                error_code=data.get('error_code', response.status_code),
+                retry_after=parameters.get('retry_after'),
+            )
+        return data.get('result')
+
+    # Bot API methods
+
+    def get_me(self):
+        """Call getMe and remember the result in ``bot_info``"""
+        self.bot_info = self.call('getMe')
+        return self.bot_info
+
+    def get_updates(self, offset=None, timeout=0, allowed_updates=None):
+        payload = {'timeout': timeout}
+        if offset:
+            payload['offset'] = offset
+        if allowed_updates is not None:
+            payload['allowed_updates'] = allowed_updates
+        # Leave Telegram time to answer an empty long poll before giving up
+        return self.call('getUpdates', payload, timeout=timeout + 5)
+
+    def send_message(self, chat_id, text, parse_mode='HTML', reply_markup=None):
+        payload = {'chat_id': chat_id, 'text': text}
+        if parse_mode:
+            payload['parse_mode'] = parse_mode
+        if reply_markup:
+            payload['reply_markup'] = reply_markup
+        return self.call('sendMessage', payload)
+
+    def answer_callback_query(self, callback_query_id, text=None, show_alert=False):
+        return self.call('answerCallbackQuery', {
+            'callback_query_id': callback_query_id,
+            'text': text,
+            'show_alert': show_alert,
+        })
+
+    def export_chat_invite_link(self, chat_id):
+        return self.call('exportChatInviteLink', {'chat_id': chat_id})
+
+    def get_chat_member(self, chat_id, user_id, max_age=0):
+        """Call getChatMember, reusing an answer at most ``max_age`` seconds old"""
+        key = (str(chat_id), str(user_id))
+        if max_age:
+            cached = self._chat_members.get(key)
+            if cached and time.monotonic() - cached[0] <= max_age:
+                return cached[1]
+        chat_member = self.call('getChatMember', {'chat_id': chat_id, 'user_id': user_id})
+        self.cache_chat_member(chat_id, user_id, chat_member)
+        return chat_member
+
+    def get_chat_administrators(self, chat_id):
+        return self.call('getChatAdministrators', {'chat_id': chat_id})
+
+    def cache_chat_member(self, chat_id, user_id, chat_member):
+        """Remember a ChatMember, e.g. the ``new_chat_member`` of an update"""
+        now = time.monotonic()
+        with self._chat_members_lock:
+            if len(self._chat_members) >= CHAT_MEMBER_CACHE_SIZE:
+                # Drop the oldest half; entries only live a few seconds anyway
+                oldest = sorted(self._chat_members, key=lambda k: self._chat_members[k][0])
+                for key in oldest[:len(oldest) // 2]:
+                    del self._chat_members[key]
+            self._chat_members[(str(chat_id), str(user_id))] = (now, chat_member)
+
+    def ban_chat_member(self, chat_id, user_id, revoke_messages=False):
+        return self.call('banChatMember', {'chat_id': chat_id, 'user_id': user_id, 'revoke_messages': revoke_messages})
+
+    def unban_chat_member(self, chat_id, user_id, only_if_banned=True):
+        return self.call('unbanChatMember', {'chat_id': chat_id, 'user_id': user_id, 'only_if_banned': only_if_banned})
+
+    def leave_chat(self, chat_id):
+        return self.call('leaveChat', {'chat_id': chat_id})
+
+    def set_webhook(self, url, secret_token=None, allowed_updates=None):
+        payload = {'url': url}
+        if secret_token:
+            payload['secret_token'] = secret_token
+        if allowed_updates is not None:
+            payload['allowed_updates'] = allowed_updates
+        return self.call('setWebhook', payload)
+
+    def delete_webhook(self):
+        return self.call('deleteWebhook')
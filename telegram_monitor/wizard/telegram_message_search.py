@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields
+
+# Hits shown per page
+PAGE_SIZE = 50
+
+
+class TelegramMessageSearch(models.TransientModel):
+    _name = 'telegram.message.search'
+    _description = 'Search Telegram Messages'
+
+    query = fields.Char('Search', required=True)
+    mode = fields.Selection([
+        ('words', 'Words'),
+        ('substring', 'Substring'),
+    ], string='Match', default='words', required=True,
+        help='Words: full-text search, supports "exact phrases", or, and -excluded words. '
+             'Substring: any text containing the search as typed.')
+    group_ids = fields.Many2many('telegram.group', string='Groups')
+    member_ids = fields.Many2many('telegram.member', string='Members')
+    side = fields.Selection([
+        ('all', 'Everyone'),
+        ('team', 'Team'),
+        ('client', 'Clients'),
+    ], string='Written By', default='all', required=True)
+    date_from = fields.Datetime('From')
+    date_to = fields.Datetime('To')
+    page = fields.Integer('Page', default=0)
+    has_more = fields.Boolean('More Results')
+    result_ids = fields.One2many('telegram.message.search.result', 'search_id', string='Results')
+
+    def action_search(self):
+        self.page = 0
+        return self._run()
+
+    def action_next_page(self):
+        self.page += 1
+        return self._run()
+
+    def action_previous_page(self):
+        self.page = max(self.page - 1, 0)
+        return self._run()
+
+    def _run(self):
+        self.ensure_one()
+        hits, has_more = self.env['telegram.message']._search_text(
+            self.query,
+            mode=self.mode,
+            group_ids=self.group_ids.ids,
+            member_ids=self.member_ids.ids,
+            side=self.side if self.side != 'all' else None,
+            date_from=self.date_from,
+            date_to=self.date_to,
+            limit=PAGE_SIZE,
+            offset=self.page * PAGE_SIZE,
+        )
+        self.result_ids = [fields.Command.clear()] + [
+            fields.Command.create({
+                'sequence': position,
+                'message_id': hit['id'],
+                'rank': hit['rank'],
+                'headline': hit['headline'],
+            })
+            for position, hit in enumerate(hits)
+        ]
+        self.has_more = has_more
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'current',
+        }
+
+
+class TelegramMessageSearchResult(models.TransientModel):
+    _name = 'telegram.message.search.result'
+    _description = 'Telegram Message Search Hit'
+    _order = 'sequence'
+
+    search_id = fields.Many2one('telegram.message.search', required=True, ondelete='cascade')
+    sequence = fields.Integer()
+    message_id = fields.Many2one('telegram.message', string='Message', required=True, ondelete='cascade')
+    rank = fields.Float('Relevance', digits=(16, 4))
+    headline = fields.Html('Excerpt', sanitize=False)
+    message_date = fields.Datetime(related='message_id.message_date')
+    group_id = fields.Many2one(related='message_id.group_id')
+    member_id = fields.Many2one(related='message_id.member_id')
+    is_from_team = fields.Boolean(related='message_id.is_from_team')
+
+    def action_open_message(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': 'telegram.message',
+            'res_id': self.message_id.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }